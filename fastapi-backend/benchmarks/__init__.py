@@ -0,0 +1,5 @@
+"""
+Performance benchmarks for the FastAPI backend.
+Run from the fastapi-backend directory, e.g. `python -m benchmarks.bench_async_db`.
+Benchmarks drive the app in-process and need httpx (`uv sync --group dev`).
+"""
@@ -0,0 +1,130 @@
+"""
+Concurrency benchmark for the contact-form write path.
+
+Floods POST /api/messages with concurrent submissions while a ticker
+coroutine measures event-loop lag and a probe hits /api/health. The real
+async route is compared against a replica of the old handler, which ran
+the synchronous Session inside `async def` and stalled the loop on every
+query and commit.
+
+Keep --concurrency below the sync pool size (5 + 10 overflow): past that
+the old handler deadlocks, blocking the loop on a pool checkout while the
+connections it waits for belong to suspended requests.
+
+    python -m benchmarks.bench_async_db --requests 500 --concurrency 10
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import asgi_client, percentile, print_table, summarize, use_temp_database
+
+use_temp_database()
+
+from fastapi import Depends, FastAPI  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import main  # noqa: E402
+from database import get_db, init_db  # noqa: E402
+from models import BlockedSender, Message  # noqa: E402
+from schemas import MessageCreate, MessageResponse  # noqa: E402
+
+# Each worker has its own limit; the benchmark comes from a single client
+main.rate_limiter.enabled = False
+
+
+def build_legacy_app() -> FastAPI:
+    """The pre-async handler: sync Session calls inside an async route"""
+    legacy = FastAPI()
+
+    @legacy.post("/api/messages", response_model=MessageResponse, status_code=201)
+    async def create_message(message: MessageCreate, db: Session = Depends(get_db)):
+        # Same shadowban lookup the old route ran before inserting
+        db.query(BlockedSender).filter(
+            (BlockedSender.email == message.email) | (BlockedSender.ip_address == "127.0.0.1")
+        ).first()
+        db_message = Message(
+            name=message.name,
+            email=message.email,
+            message=message.message,
+            ip_address="127.0.0.1",
+        )
+        db.add(db_message)
+        db.commit()
+        db.refresh(db_message)
+        return db_message
+
+    @legacy.get("/api/health")
+    def health_check():
+        return {"status": "healthy"}
+
+    return legacy
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float, lags: list) -> None:
+    """Record how late each tick fires; a blocked loop shows up as lag"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - scheduled))
+
+
+async def probe_health(client, stop: asyncio.Event, latencies: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/api/health")
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.005)
+
+
+async def run_flood(app, requests: int, concurrency: int) -> dict:
+    async with asgi_client(app) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, lags, probes = [], [], []
+        stop = asyncio.Event()
+
+        async def submit(i: int) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/messages", json={
+                    "name": f"Bench {i}",
+                    "email": f"bench{i}@example.com",
+                    "message": "Concurrency benchmark submission",
+                })
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        background = [
+            asyncio.create_task(measure_loop_lag(stop, 0.001, lags)),
+            asyncio.create_task(probe_health(client, stop, probes)),
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*(submit(i) for i in range(requests)))
+        wall = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*background)
+
+    result = summarize(latencies, wall)
+    result["loop_lag_p99_ms"] = round(percentile(lags, 99) * 1000, 3)
+    result["loop_lag_max_ms"] = round(max(lags, default=0.0) * 1000, 3)
+    result["health_p99_ms"] = round(percentile(probes, 99) * 1000, 3)
+    return result
+
+
+async def run(requests: int, concurrency: int) -> None:
+    # The legacy app has no lifespan, so the schema must exist before it runs
+    init_db()
+    rows = {
+        "sync session": await run_flood(build_legacy_app(), requests, concurrency),
+        "async session": await run_flood(main.app, requests, concurrency),
+    }
+    print_table(f"POST /api/messages x{requests}, concurrency {concurrency}", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency))
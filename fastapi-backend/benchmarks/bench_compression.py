@@ -0,0 +1,149 @@
+"""
+Microbenchmark: bytes saved and CPU spent compressing each route's body.
+
+    python -m benchmarks.bench_compression --messages 5000 --iterations 50
+
+Bodies are fetched uncompressed through the app, then compressed the way
+CompressionMiddleware would, each encoding timed in CPU time per body:
+- cpu_us: one-off compression (uncached bodies, stream chunks)
+- cached: "yes" for responses with a strong ETag; their compressed body is
+  kept in the precompressed cache, so cpu_us is paid once per ETag, not
+  per request (brotli uses the higher cached quality for them)
+- hit_us: serving the same response again from the precompressed cache
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import asgi_client, use_temp_database
+
+use_temp_database()
+
+from sqlalchemy import insert  # noqa: E402
+
+import main  # noqa: E402
+from catalog import bulk_write  # noqa: E402
+from compression import StreamCompressor, brotli, compress, compressed_cache  # noqa: E402
+from database import SessionLocal, engine, init_db  # noqa: E402
+from models import BlockedSender, Message  # noqa: E402
+from schemas import ProjectCreate, SkillCreate  # noqa: E402
+
+ADMIN_HEADERS = {"X-Admin-Secret": main.ADMIN_SECRET}
+ROUTES = [
+    "/api/projects",
+    "/api/skills",
+    "/api/bootstrap",
+    "/api/admin/messages?limit=200",
+    "/api/admin/blocked",
+    "/api/admin/messages/export",
+]
+ENCODINGS = ["gzip", "br"] if brotli is not None else ["gzip"]
+
+
+def seed(messages: int) -> None:
+    init_db()
+    with SessionLocal() as db:
+        bulk_write(db, "project", [
+            ProjectCreate(
+                title=f"Project {i}",
+                description="A benchmark project with a description of typical length. " * 3,
+                tech_stack=["Python", "FastAPI", "PostgreSQL", "React"][: 1 + i % 4],
+                github_link=f"https://github.com/example/project-{i}",
+                image_url=f"https://images.example.com/project-{i}.png",
+            )
+            for i in range(40)
+        ])
+        bulk_write(db, "skill", [
+            SkillCreate(name=f"Skill {i}", category=("Languages", "Frameworks", "Tools")[i % 3]) for i in range(30)
+        ])
+        db.commit()
+    with engine.begin() as conn:
+        conn.execute(insert(Message), [
+            {
+                "name": f"Sender {i % 300}",
+                "email": f"sender{i % 300}@example.com",
+                "message": f"Hi, I saw your portfolio and wanted to ask about project {i % 40}. " * 2,
+                "ip_address": f"198.51.100.{i % 250}",
+            }
+            for i in range(messages)
+        ])
+        conn.execute(insert(BlockedSender), [
+            {"email": f"spammer{i}@example.com", "reason": "Repeated SEO spam"} for i in range(500)
+        ])
+
+
+def cpu_us(func, iterations: int) -> float:
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return round((time.process_time() - started) / iterations * 1e6, 1)
+
+
+def stream_compress(chunks: list, encoding: str) -> bytes:
+    streamer = StreamCompressor(encoding)
+    return b"".join(streamer.chunk(chunk) for chunk in chunks) + streamer.finish()
+
+
+async def fetch(client, route: str):
+    headers = {"Accept-Encoding": "identity"}
+    if route.startswith("/api/admin"):
+        headers.update(ADMIN_HEADERS)
+    chunks = []
+    async with client.stream("GET", route, headers=headers) as response:
+        async for chunk in response.aiter_raw():
+            chunks.append(chunk)
+    return response, chunks
+
+
+async def run(args) -> list:
+    seed(args.messages)
+    rows = []
+    async with asgi_client(main.app) as client:
+        for route in ROUTES:
+            response, chunks = await fetch(client, route)
+            body = b"".join(chunks)
+            etag = response.headers.get("etag", "")
+            cached = bool(etag) and not etag.startswith("W/")
+            streamed = "export" in route
+            for encoding in ENCODINGS:
+                if streamed:
+                    out = stream_compress(chunks, encoding)
+                    cost = cpu_us(lambda: stream_compress(chunks, encoding), args.iterations)
+                else:
+                    out = compress(body, encoding, cached=cached)
+                    cost = cpu_us(lambda: compress(body, encoding, cached=cached), args.iterations)
+                hit = "-"
+                if cached:
+                    key = (etag, encoding)
+                    compressed_cache.put(key, out)
+                    hit = cpu_us(lambda: compressed_cache.get(key), args.iterations * 100)
+                rows.append({
+                    "route": route.split("?")[0],
+                    "encoding": encoding,
+                    "bytes": len(body),
+                    "compressed": len(out),
+                    "saved_pct": round(100 * (1 - len(out) / len(body)), 1) if body else 0.0,
+                    "cpu_us": cost,
+                    "cached": "yes" if cached else "no",
+                    "hit_us": hit,
+                })
+    return rows
+
+
+def print_rows(rows: list) -> None:
+    columns = list(rows[0])
+    widths = [max(len(col), *(len(str(row[col])) for row in rows)) + 2 for col in columns]
+    print("\nResponse compression per route")
+    print("".join(col.rjust(w) if i else col.ljust(w) for i, (col, w) in enumerate(zip(columns, widths))))
+    for row in rows:
+        print("".join(
+            str(row[col]).rjust(w) if i else str(row[col]).ljust(w)
+            for i, (col, w) in enumerate(zip(columns, widths))
+        ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=5000, help="rows in messages (export size)")
+    parser.add_argument("--iterations", type=int, default=50, help="compressions timed per route and encoding")
+    print_rows(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,81 @@
+"""
+Concurrent write throughput on the messages table for each DB_PROFILE.
+
+Every profile gets a fresh database. N writer threads each insert rows
+one at a time with a commit per row, which is the contact-form write
+pattern. The benchmark reports rows/second and commit latency.
+
+    python -m benchmarks.bench_db_profiles --threads 8 --rows 200
+    python -m benchmarks.bench_db_profiles --url postgresql://user:pw@localhost/bench
+"""
+import argparse
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.common import print_table, summarize, use_temp_database
+
+bench_db = use_temp_database()
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from database import Base, DB_PROFILES, create_tuned_engine  # noqa: E402
+from models import EmailOutbox, Message  # noqa: E402
+
+
+def run_profile(url: str, profile: str, threads: int, rows: int) -> dict:
+    engine = create_tuned_engine(url, profile)
+    # email_outbox references messages, so it has to go first on PostgreSQL
+    Base.metadata.drop_all(bind=engine, tables=[EmailOutbox.__table__, Message.__table__])
+    Base.metadata.create_all(bind=engine, tables=[Message.__table__])
+    Session = sessionmaker(bind=engine)
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def writer(worker: int) -> None:
+        barrier.wait()
+        local = []
+        for i in range(rows):
+            started = time.perf_counter()
+            with Session() as db:
+                db.add(Message(
+                    name=f"Writer {worker}",
+                    email=f"writer{worker}@example.com",
+                    message=f"Benchmark row {i}",
+                    ip_address="198.51.100.7",
+                ))
+                db.commit()
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+    engine.dispose()
+    return summarize(latencies, wall)
+
+
+def main(url: str, threads: int, rows: int) -> None:
+    results = {}
+    for profile in DB_PROFILES:
+        target = url
+        if not target:
+            # Fresh file per profile so journal_mode from one run doesn't leak into the next
+            target = f"sqlite:///{Path(bench_db).with_name(f'{profile}.db')}"
+        results[profile] = run_profile(target, profile, threads, rows)
+    print_table(f"messages inserts: {threads} threads x {rows} rows, commit per row", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="", help="database URL (default: temporary SQLite files)")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=200)
+    args = parser.parse_args()
+    main(args.url, args.threads, args.rows)
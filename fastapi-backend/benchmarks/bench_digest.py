@@ -0,0 +1,87 @@
+"""
+Provider calls and render cost for contact notifications, per 1,000 messages.
+
+Compares one email per message against digest mode at a few batch sizes.
+The provider is stubbed: each call is counted and charged a simulated
+latency instead of going over the network.
+
+    python -m benchmarks.bench_digest --messages 1000 --provider-ms 150
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import print_table, use_temp_database
+
+use_temp_database()
+# Pretend SMTP is configured so the send paths run end to end
+os.environ.update(MAIL_USERNAME="bench", MAIL_PASSWORD="bench", MAIL_TO="owner@example.com")
+
+import email_service  # noqa: E402
+
+
+def make_messages(count: int) -> list:
+    return [
+        {
+            "name": f"Sender {i}",
+            "email": f"sender{i}@example.com",
+            "message": f"Hello <b>there</b> & welcome — message {i}\n" * 3,
+            "ip_address": f"198.51.100.{i % 256}",
+        }
+        for i in range(count)
+    ]
+
+
+async def run_mode(messages: list, batch_size: int, provider_ms: float) -> dict:
+    calls = 0
+    render_seconds = 0.0
+    real_render = email_service.render_contact_email
+
+    def timed_render(batch):
+        nonlocal render_seconds
+        started = time.perf_counter()
+        html = real_render(batch)
+        render_seconds += time.perf_counter() - started
+        return html
+
+    async def stub_deliver(subject, html_content, reply_to=None):
+        nonlocal calls
+        calls += 1
+        return True
+
+    email_service.render_contact_email = timed_render
+    email_service.deliver_email = stub_deliver
+    try:
+        if batch_size == 1:
+            for entry in messages:
+                await email_service.send_contact_notification(**entry)
+        else:
+            for start in range(0, len(messages), batch_size):
+                await email_service.send_contact_digest(messages[start:start + batch_size])
+    finally:
+        email_service.render_contact_email = real_render
+
+    return {
+        "provider_calls": calls,
+        "render_ms": round(render_seconds * 1000, 2),
+        "render_us_per_msg": round(render_seconds / len(messages) * 1e6, 2),
+        "provider_s": round(calls * provider_ms / 1000, 2),
+    }
+
+
+async def run(count: int, provider_ms: float) -> None:
+    messages = make_messages(count)
+    email_service.get_contact_template()  # compile outside the timed region
+    rows = {"per message": await run_mode(messages, 1, provider_ms)}
+    for batch_size in (10, 25, 100):
+        rows[f"digest of {batch_size}"] = await run_mode(messages, batch_size, provider_ms)
+    print_table(f"{count} contact notifications, {provider_ms:g} ms simulated provider latency", rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--provider-ms", type=float, default=150.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.provider_ms))
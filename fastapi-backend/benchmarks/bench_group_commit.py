@@ -0,0 +1,84 @@
+"""
+Burst benchmark: per-request commits vs group commit for POST /api/messages.
+
+Fires --requests concurrent submissions at the app, once with every
+request committing on its own and once through the group-commit writer
+at each --interval (milliseconds). rps counts successful requests;
+errors are submissions that failed, typically 'database is locked' after
+waiting out busy_timeout in the write convoy. Set DB_PROFILE=durable to
+see the effect when every commit is an fsync.
+
+    python -m benchmarks.bench_group_commit --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import asgi_client, print_table, summarize, use_temp_database
+
+use_temp_database()
+
+import main  # noqa: E402
+from database import DB_PROFILE  # noqa: E402
+from group_commit import MessageWriter  # noqa: E402
+
+# Each worker has its own limit; the benchmark comes from a single client
+main.rate_limiter.enabled = False
+
+
+async def run_burst(requests: int, concurrency: int, writer=None) -> dict:
+    async with asgi_client(main.app) as client:
+        if writer is not None:
+            main.message_writer = writer
+            writer.start()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        errors = 0
+
+        async def submit(i: int) -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/api/messages", json={
+                        "name": f"Bench {i}",
+                        "email": f"bench{i}@example.com",
+                        "message": f"Burst benchmark submission number {i}, asking about project {i % 40}",
+                    })
+                    response.raise_for_status()
+                except Exception:
+                    # e.g. 'database is locked' once the writer convoy outlasts busy_timeout
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(submit(i) for i in range(requests)))
+        wall = time.perf_counter() - started
+        if writer is not None:
+            await writer.stop()
+    result = summarize(latencies, wall)
+    result["errors"] = errors
+    result["avg_batch"] = writer.stats()["avg_batch"] if writer is not None else 1.0
+    return result
+
+
+async def run(args) -> None:
+    rows = {"per-request commit": await run_burst(args.requests, args.concurrency)}
+    for interval in args.interval:
+        writer = MessageWriter(interval=interval / 1000, max_batch=args.max_batch)
+        rows[f"group commit {interval:g}ms"] = await run_burst(args.requests, args.concurrency, writer)
+    print_table(
+        f"POST /api/messages x{args.requests}, concurrency {args.concurrency}, DB_PROFILE={DB_PROFILE}",
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--interval", type=float, nargs="+", default=[0, 2, 5],
+                        help="group-commit flush intervals to try, in milliseconds")
+    parser.add_argument("--max-batch", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
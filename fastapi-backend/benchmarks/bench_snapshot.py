@@ -0,0 +1,88 @@
+"""
+Microbenchmark: per-request serialization of the projects catalog versus
+serving the pre-serialized snapshot.
+
+    python -m benchmarks.bench_snapshot --projects 200 --iterations 2000
+
+Paths compared, each timed per call:
+- pydantic: query ORM rows, validate with from_attributes, dump_json
+  (what every uncached GET /api/projects used to do)
+- snapshot_rebuild: column select + orjson (paid once per catalog write)
+- snapshot_serve: look up the snapshot bytes and wrap them in a Response
+"""
+import argparse
+import time
+
+from benchmarks.common import print_table, summarize, use_temp_database
+
+use_temp_database()
+
+from fastapi import Response  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from typing import List  # noqa: E402
+
+from database import SessionLocal, init_db  # noqa: E402
+from models import Project  # noqa: E402
+from schemas import ProjectResponse  # noqa: E402
+from snapshot import catalog_snapshot, serialize_catalog  # noqa: E402
+
+projects_adapter = TypeAdapter(List[ProjectResponse])
+
+
+def seed_projects(count: int) -> None:
+    init_db()
+    with SessionLocal() as db:
+        db.add_all(
+            Project(
+                title=f"Project {i}",
+                description="A benchmark project with a description of typical length. " * 3,
+                tech_stack=["Python", "FastAPI", "PostgreSQL", "React"],
+                github_link=f"https://github.com/example/project-{i}",
+                image_url=f"https://images.example.com/project-{i}.png",
+            )
+            for i in range(count)
+        )
+        db.commit()
+
+
+def time_calls(func, iterations: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main(projects: int, iterations: int) -> None:
+    seed_projects(projects)
+    with SessionLocal() as db:
+        def pydantic_path():
+            db.expunge_all()
+            rows = db.query(Project).all()
+            return projects_adapter.dump_json(projects_adapter.validate_python(rows, from_attributes=True))
+
+        def rebuild_path():
+            return serialize_catalog(db, "projects")
+
+        catalog_snapshot.rebuild(db, "projects")
+
+        def serve_path():
+            entry = catalog_snapshot.get("projects")
+            return Response(content=entry.body, media_type="application/json")
+
+        results = {
+            "pydantic": time_calls(pydantic_path, iterations),
+            "snapshot_rebuild": time_calls(rebuild_path, iterations),
+            "snapshot_serve": time_calls(serve_path, iterations),
+        }
+    print_table(f"GET /api/projects body, {projects} projects x {iterations} calls", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.projects, args.iterations)
@@ -0,0 +1,99 @@
+"""
+Cold-start benchmark: import time of main and latency of the first request.
+
+Each run starts a fresh interpreter, imports main, runs the lifespan
+startup, and serves GET /api/projects in-process, timing each phase. It
+also lists the slowest imports from `python -X importtime`.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.common import print_table, use_temp_database
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def first_request():
+    import httpx
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/api/projects")
+            response.raise_for_status()
+        return ready, time.perf_counter()
+
+ready, served = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (served - ready) * 1000,
+    "total_ms": (served - started) * 1000,
+}))
+"""
+
+
+def run_child(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(env: dict, top: int) -> list:
+    """(cumulative_ms, module) for the heaviest modules main imports directly"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        # "import time:  self_us | cumulative_us | <indent>module"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        module = module[1:]
+        # Nesting adds two spaces per level; keep what main imports directly
+        if module.startswith("  ") and not module.startswith("   "):
+            timings.append((int(cumulative) / 1000, module.strip()))
+    return sorted(timings, reverse=True)[:top]
+
+
+def main(runs: int, top: int) -> None:
+    use_temp_database()
+    env = dict(os.environ)
+    samples = [run_child(env) for _ in range(runs)]
+    rows = {
+        phase: {
+            "median_ms": round(statistics.median(s[phase] for s in samples), 1),
+            "min_ms": round(min(s[phase] for s in samples), 1),
+            "max_ms": round(max(s[phase] for s in samples), 1),
+        }
+        for phase in ("import_ms", "startup_ms", "first_request_ms", "total_ms")
+    }
+    print_table(f"Cold start over {runs} fresh interpreters", rows)
+
+    print("\nSlowest top-level imports (cumulative ms)")
+    for cumulative_ms, module in slowest_imports(env, top):
+        print(f"  {cumulative_ms:8.1f}  {module}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    main(args.runs, args.top)
@@ -0,0 +1,66 @@
+"""
+Shared helpers for the backend benchmarks.
+Every benchmark runs against a throwaway SQLite file with email delivery
+disabled, so call use_temp_database() before importing main or database.
+"""
+import math
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+
+def use_temp_database(name: str = "bench.db") -> Path:
+    """Point DATABASE_URL at a fresh SQLite file and switch off email delivery"""
+    path = Path(tempfile.mkdtemp(prefix="portfolio-bench-")) / name
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # Empty values stop load_dotenv from pulling real credentials in from .env
+    for var in ("RESEND_API_KEY", "MAIL_USERNAME", "MAIL_PASSWORD"):
+        os.environ[var] = ""
+    os.environ.setdefault("ADMIN_SECRET", "bench-secret")
+    return path
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of samples (pct in 0-100)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict[str, float]:
+    """Throughput and latency percentiles (milliseconds) for one run"""
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / wall_seconds, 1) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 3),
+    }
+
+
+@asynccontextmanager
+async def asgi_client(app):
+    """httpx client bound to the app in-process, with its lifespan running"""
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, float]]) -> None:
+    """Print one row per scenario with a shared set of columns"""
+    columns = list(next(iter(rows.values())).keys())
+    width = max(len(name) for name in rows) + 2
+    col_widths = [max(10, len(col)) + 2 for col in columns]
+    print(f"\n{title}")
+    print("-" * len(title))
+    print("".ljust(width) + "".join(col.rjust(w) for col, w in zip(columns, col_widths)))
+    for name, row in rows.items():
+        print(name.ljust(width) + "".join(str(row[col]).rjust(w) for col, w in zip(columns, col_widths)))
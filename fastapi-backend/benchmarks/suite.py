@@ -0,0 +1,286 @@
+"""
+Scripted load scenarios against the whole API, checked against baselines.
+
+The app runs in-process behind an httpx ASGI transport, with its lifespan,
+on a throwaway SQLite database. Email delivery is stubbed: the outbox
+worker's send functions only sleep for --provider-ms. Request order and
+sender mixes come from a seeded RNG, so runs are repeatable.
+
+Scenarios:
+- read_storm: GET /api/projects and /api/skills, a quarter of them conditional
+- contact_flood: POST /api/messages, mixing honeypot, shadowbanned and
+  legitimate senders
+- admin_listing: GET /api/admin/messages over a 100k-row messages table
+  (newest page, email filter, date window, cursor walks)
+- admin_search: GET /api/admin/messages/search over the same table, from
+  rare to very common terms, ranked and newest-first
+
+    python -m benchmarks.suite                      # run all, compare to baselines
+    python -m benchmarks.suite --scenario read_storm
+    python -m benchmarks.suite --update-baselines   # record this machine's numbers
+
+Exits with status 1 when a scenario's throughput drops, or its p50/p95
+latency grows, by more than --tolerance relative to benchmarks/baselines.json.
+Baselines are machine-specific: record them on the machine that runs the check.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from benchmarks.common import asgi_client, print_table, summarize, use_temp_database
+
+use_temp_database()
+# Email counts as configured so legitimate messages go through the outbox
+os.environ.update(MAIL_USERNAME="bench", MAIL_PASSWORD="bench", MAIL_TO="owner@example.com")
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+
+from sqlalchemy import insert  # noqa: E402
+
+import main  # noqa: E402
+from catalog import bulk_write  # noqa: E402
+from database import SessionLocal, engine, init_db  # noqa: E402
+from models import Message, utcnow  # noqa: E402
+from schemas import ProjectCreate, SkillCreate  # noqa: E402
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+ADMIN_HEADERS = {"X-Admin-Secret": os.environ["ADMIN_SECRET"]}
+# Metric -> True when higher is better
+# p99 is reported but not checked: a few hundred samples make it too noisy to gate on
+CHECKED_METRICS = {"rps": True, "p50_ms": False, "p95_ms": False}
+SEED = 1105
+# Seeded message bodies draw from this vocabulary; earlier words are far more common
+VOCABULARY = ["offer", "crypto", "seo", "backlinks", "project", "hiring", "django", "collaboration", "freelance", "resume"]
+
+# A single client would trip every per-IP limit; the suite measures the handlers
+main.rate_limiter.enabled = False
+
+
+def stub_provider(provider_ms: float) -> None:
+    async def send(*args, **kwargs) -> bool:
+        await asyncio.sleep(provider_ms / 1000)
+        return True
+
+    main.outbox_worker.send = send
+    main.outbox_worker.send_digest = send
+
+
+def seed_catalog(projects: int = 40) -> None:
+    with SessionLocal() as db:
+        bulk_write(db, "project", [
+            ProjectCreate(
+                title=f"Project {i}",
+                description="Benchmark project description of a realistic length. " * 3,
+                tech_stack=["Python", "FastAPI", "React", "PostgreSQL"][: 1 + i % 4],
+                github_link=f"https://github.com/example/project-{i}",
+                image_url=f"/project-{i}.png",
+            )
+            for i in range(projects)
+        ])
+        bulk_write(db, "skill", [
+            SkillCreate(name=f"Skill {i}", category=("Languages", "Frameworks", "Tools")[i % 3])
+            for i in range(30)
+        ])
+        db.commit()
+
+
+def seed_messages(count: int, senders: int = 500) -> None:
+    """Bulk-insert count messages spread over the last year, newest last (once per run)"""
+    if getattr(seed_messages, "done", False):
+        return
+    seed_messages.done = True
+    rng = random.Random(SEED)
+    weights = [1 / (rank + 1) ** 1.5 for rank in range(len(VOCABULARY))]
+    start = utcnow() - timedelta(days=365)
+    step = timedelta(days=365) / max(count, 1)
+    chunk = []
+    with engine.begin() as conn:
+        for i in range(count):
+            sender = rng.randrange(senders)
+            chunk.append({
+                "name": f"Sender {sender}",
+                "email": f"sender{sender}@example.com",
+                "message": "Seeded message about " + " ".join(rng.choices(VOCABULARY, weights, k=6)),
+                "ip_address": f"198.51.{sender // 256}.{sender % 256}",
+                "created_at": start + step * i,
+            })
+            if len(chunk) == 10000:
+                conn.execute(insert(Message), chunk)
+                chunk = []
+        if chunk:
+            conn.execute(insert(Message), chunk)
+
+
+async def drive(client, requests: list, concurrency: int, warmup: int = 20) -> dict:
+    """
+    Send (method, url, kwargs) requests with bounded concurrency and return
+    the latency summary. The first `warmup` requests are not recorded.
+    """
+    for method, url, kwargs in requests[:warmup]:
+        await client.request(method, url, **kwargs)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def send(method: str, url: str, kwargs: dict) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text[:200]}")
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send(*request) for request in requests[warmup:]))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def read_storm(client, args) -> dict:
+    etags = {}
+    for path in ("/api/projects", "/api/skills"):
+        etags[path] = (await client.get(path)).headers["etag"]
+    rng = random.Random(SEED)
+    requests = []
+    for i in range(args.requests):
+        path = "/api/projects" if i % 2 == 0 else "/api/skills"
+        headers = {"If-None-Match": etags[path]} if rng.random() < 0.25 else {}
+        requests.append(("GET", path, {"headers": headers}))
+    return await drive(client, requests, args.concurrency)
+
+
+async def contact_flood(client, args) -> dict:
+    await client.post("/api/admin/block", headers=ADMIN_HEADERS, json={"email": "blocked@example.com"})
+    await client.post("/api/admin/block", headers=ADMIN_HEADERS, json={"ip_address": "203.0.113.0/24"})
+    rng = random.Random(SEED)
+    requests = []
+    for i in range(args.requests):
+        roll = rng.random()
+        body = {"name": f"Visitor {i}", "email": f"visitor{i}@example.com", "message": "Hello from the suite"}
+        ip = f"192.0.2.{i % 250}"
+        if roll < 0.1:
+            body["bot_check"] = "http://spam.example"
+        elif roll < 0.2:
+            body["email"] = "blocked@example.com"
+        elif roll < 0.3:
+            ip = f"203.0.113.{i % 250}"
+        requests.append(("POST", "/api/messages", {"json": body, "headers": {"X-Forwarded-For": ip}}))
+    return await drive(client, requests, min(args.concurrency, 10))
+
+
+async def admin_listing(client, args) -> dict:
+    await asyncio.to_thread(seed_messages, args.messages)
+    rng = random.Random(SEED)
+    since = (utcnow() - timedelta(days=30)).isoformat()
+    # Cursors from a short walk down the newest pages, reused as deep-page requests
+    cursors = []
+    page = (await client.get("/api/admin/messages?limit=50", headers=ADMIN_HEADERS)).json()
+    while page["next_cursor"] and len(cursors) < 20:
+        cursors.append(page["next_cursor"])
+        page = (await client.get(
+            f"/api/admin/messages?limit=50&cursor={page['next_cursor']}", headers=ADMIN_HEADERS
+        )).json()
+
+    requests = []
+    for _ in range(args.requests // 2):
+        kind = rng.randrange(4)
+        if kind == 0:
+            url = "/api/admin/messages?limit=50"
+        elif kind == 1:
+            url = f"/api/admin/messages?limit=50&email=sender{rng.randrange(500)}@example.com"
+        elif kind == 2:
+            url = f"/api/admin/messages?limit=100&since={since}"
+        else:
+            url = f"/api/admin/messages?limit=50&cursor={rng.choice(cursors)}"
+        requests.append(("GET", url, {"headers": ADMIN_HEADERS}))
+    return await drive(client, requests, args.concurrency)
+
+
+async def admin_search(client, args) -> dict:
+    await asyncio.to_thread(seed_messages, args.messages)
+    rng = random.Random(SEED)
+    requests = []
+    for _ in range(args.requests // 2):
+        params = {
+            "q": rng.choice(VOCABULARY + ["crypto offer", "djan*", "sender42@example.com"]),
+            "order": "rank" if rng.random() < 0.75 else "recent",
+        }
+        requests.append(("GET", "/api/admin/messages/search", {"params": params, "headers": ADMIN_HEADERS}))
+    return await drive(client, requests, args.concurrency)
+
+
+SCENARIOS = {
+    "read_storm": read_storm,
+    "contact_flood": contact_flood,
+    "admin_listing": admin_listing,
+    "admin_search": admin_search,
+}
+
+
+def compare(results: dict, baselines: dict, tolerance: float) -> list:
+    """Human-readable regressions of results against baselines"""
+    regressions = []
+    for scenario, row in results.items():
+        baseline = baselines.get(scenario)
+        if not baseline:
+            continue
+        for metric, higher_is_better in CHECKED_METRICS.items():
+            expected, actual = baseline[metric], row[metric]
+            if higher_is_better and actual < expected * (1 - tolerance):
+                regressions.append(f"{scenario}: {metric} {actual} < baseline {expected}")
+            if not higher_is_better and actual > expected * (1 + tolerance):
+                regressions.append(f"{scenario}: {metric} {actual} > baseline {expected}")
+    return regressions
+
+
+async def run(args) -> dict:
+    init_db()
+    seed_catalog()
+    stub_provider(args.provider_ms)
+    results = {}
+    async with asgi_client(main.app) as client:
+        for name in args.scenario or SCENARIOS:
+            results[name] = await SCENARIOS[name](client, args)
+    return results
+
+
+def main_cli(args) -> int:
+    results = asyncio.run(run(args))
+    print_table(f"Benchmark suite (concurrency {args.concurrency}, {args.requests} requests)", results)
+
+    if args.update_baselines:
+        baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+        for scenario, row in results.items():
+            baselines[scenario] = {metric: row[metric] for metric in ("rps", "p50_ms", "p95_ms", "p99_ms")}
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaselines written to {BASELINES_PATH}")
+        return 0
+
+    if not BASELINES_PATH.exists():
+        print("\nNo baselines recorded yet; run with --update-baselines")
+        return 0
+    regressions = compare(results, json.loads(BASELINES_PATH.read_text()), args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="run only this scenario (repeatable)")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=100_000, help="rows in messages for admin_listing")
+    parser.add_argument("--provider-ms", type=float, default=50, help="simulated email provider latency")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed relative regression")
+    parser.add_argument("--update-baselines", action="store_true")
+    sys.exit(main_cli(parser.parse_args()))
@@ -0,0 +1,168 @@
+"""
+In-memory index of blocked senders for shadowban checks.
+Emails live in a hash set, IPs and CIDR ranges in a binary prefix trie per
+address family, so a lookup is one dict probe plus at most 32 (IPv4) or
+128 (IPv6) trie steps and never touches the database.
+"""
+import ipaddress
+import threading
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_network(value: Optional[str]) -> Optional[IPNetwork]:
+    """Parse an IP address or CIDR range; None if empty or invalid"""
+    if not value:
+        return None
+    try:
+        network = ipaddress.ip_network(value.strip(), strict=False)
+    except ValueError:
+        return None
+    # Dual-stack sockets report IPv4 clients as ::ffff:a.b.c.d
+    if network.version == 6 and network.network_address.ipv4_mapped and network.prefixlen >= 96:
+        mapped = network.network_address.ipv4_mapped
+        network = ipaddress.ip_network(f"{mapped}/{network.prefixlen - 96}", strict=False)
+    return network
+
+
+def format_network(network: IPNetwork) -> str:
+    """Single hosts are stored as a bare address, ranges in CIDR notation"""
+    if network.prefixlen == network.max_prefixlen:
+        return str(network.network_address)
+    return str(network)
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+class PrefixTrie:
+    """
+    Binary trie over address bits. Each node is [zero, one, count]; a
+    non-zero count marks a blocked prefix ending at that node.
+    """
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.root: list = [None, None, 0]
+
+    def _path(self, network: IPNetwork):
+        value = int(network.network_address)
+        for depth in range(network.prefixlen):
+            yield (value >> (self.bits - 1 - depth)) & 1
+
+    def add(self, network: IPNetwork) -> None:
+        node = self.root
+        for bit in self._path(network):
+            if node[bit] is None:
+                node[bit] = [None, None, 0]
+            node = node[bit]
+        node[2] += 1
+
+    def remove(self, network: IPNetwork) -> None:
+        trail = [self.root]
+        for bit in self._path(network):
+            child = trail[-1][bit]
+            if child is None:
+                return
+            trail.append(child)
+        node = trail[-1]
+        if node[2] == 0:
+            return
+        node[2] -= 1
+
+        # Prune branches that no longer lead to any blocked prefix
+        bits = list(self._path(network))
+        for depth in range(len(bits) - 1, -1, -1):
+            node = trail[depth + 1]
+            if node[2] or node[0] is not None or node[1] is not None:
+                break
+            trail[depth][bits[depth]] = None
+
+    def covers(self, network: IPNetwork) -> bool:
+        """True if a stored prefix contains the whole network (or address)"""
+        node = self.root
+        if node[2]:
+            return True
+        for bit in self._path(network):
+            node = node[bit]
+            if node is None:
+                return False
+            if node[2]:
+                return True
+        return False
+
+
+class BlocklistIndex:
+    """Thread-safe index of blocked emails and IP ranges, keyed by row id"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._emails: Dict[str, int] = {}
+        self._tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        self._entries: Dict[int, Tuple[Optional[str], Optional[IPNetwork]]] = {}
+
+    def load(self, rows: Iterable[Tuple[int, Optional[str], Optional[str]]]) -> None:
+        """Replace the index with (id, email, ip_address) rows from blocked_senders"""
+        with self._lock:
+            self._reset()
+            for block_id, email, ip_address in rows:
+                self._add(block_id, email, ip_address)
+
+    def add(self, block_id: int, email: Optional[str], ip_address: Optional[str]) -> None:
+        with self._lock:
+            self._add(block_id, email, ip_address)
+
+    def _add(self, block_id: int, email: Optional[str], ip_address: Optional[str]) -> None:
+        if block_id in self._entries:
+            return
+        email = normalize_email(email)
+        network = parse_network(ip_address)
+        self._entries[block_id] = (email, network)
+        if email:
+            self._emails[email] = self._emails.get(email, 0) + 1
+        if network is not None:
+            self._tries[network.version].add(network)
+
+    def remove(self, block_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(block_id, None)
+            if entry is None:
+                return
+            email, network = entry
+            if email:
+                remaining = self._emails.get(email, 0) - 1
+                if remaining > 0:
+                    self._emails[email] = remaining
+                else:
+                    self._emails.pop(email, None)
+            if network is not None:
+                self._tries[network.version].remove(network)
+
+    def contains(self, email: Optional[str], network: Optional[IPNetwork]) -> bool:
+        """True if the email is blocked or the network falls inside a blocked range"""
+        email = normalize_email(email)
+        with self._lock:
+            if email and email in self._emails:
+                return True
+            return network is not None and self._tries[network.version].covers(network)
+
+    def is_blocked(self, email: Optional[str], ip_address: Optional[str]) -> bool:
+        return self.contains(email, parse_network(ip_address))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "emails": len(self._emails),
+                "networks": sum(1 for _, network in self._entries.values() if network is not None),
+            }
+
+
+blocklist = BlocklistIndex()
@@ -0,0 +1,128 @@
+"""
+In-process read-through cache for public read endpoints.
+Stores serialized response bodies together with a strong ETag so repeat
+requests skip the database entirely and conditional requests get a 304.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+# Seconds a cached body stays fresh before the next request rebuilds it
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "300"))
+# Compressed representations carry their own strong ETag, the identity one
+# with a suffix inside the quotes ("<hash>-br"); see compression.py
+ETAG_ENCODING_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+
+class CachedBody:
+    """A serialized response body and its strong ETag"""
+
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body: bytes, ttl: float):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.expires_at = time.monotonic() + ttl
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL cache keyed by endpoint name.
+    Sync routes run in the threadpool, so every access goes through a lock.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, CachedBody] = {}
+        # Bumped by invalidate(); a build that started before an invalidation
+        # of its key must not store its (possibly stale) result
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _generation(self, key: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(key, 0)
+
+    def get_or_build(self, key: str, build: Callable[[], bytes]) -> Tuple[CachedBody, bool]:
+        """
+        Return the cached body for key, calling build() on a miss or expiry.
+        The second item of the tuple is True on a cache hit.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry, True
+            self.misses += 1
+            generation = self._generation(key)
+
+        # Build outside the lock so a slow query doesn't block other keys
+        entry = CachedBody(build(), self.ttl)
+        with self._lock:
+            if self._generation(key) == generation:
+                self._entries[key] = entry
+        return entry, False
+
+    def invalidate(self, *keys: str) -> None:
+        """Drop the given keys, or everything when called without arguments"""
+        with self._lock:
+            if not keys:
+                self._entries.clear()
+                self._epoch += 1
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl,
+            }
+
+
+def opaque_tag(etag: str) -> str:
+    """The validator without its weak prefix or content-coding suffix"""
+    opaque = etag.strip().removeprefix("W/")
+    for suffix in ETAG_ENCODING_SUFFIXES.values():
+        if opaque.endswith(suffix + '"'):
+            return opaque[: -len(suffix) - 1] + '"'
+    return opaque
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag (RFC 9110).
+    The ETag of any compressed representation of the body matches too.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = opaque_tag(etag)
+    return any(opaque_tag(candidate) == opaque for candidate in if_none_match.split(","))
+
+
+def cached_response(request: Request, entry: CachedBody, hit: bool) -> Response:
+    """Build a 200 or 304 response for a cached body"""
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": "no-cache",
+        "X-Cache": "HIT" if hit else "MISS",
+    }
+    if etag_matches(request.headers.get("If-None-Match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache()
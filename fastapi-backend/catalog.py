@@ -0,0 +1,215 @@
+"""
+Bulk writes for the public catalog (projects, skills).
+
+Rows are written in chunks: one SELECT finds which natural keys (project
+title, skill name) already exist, then one executemany INSERT for the new
+rows and one executemany UPDATE by primary key for the rest. That keeps a
+catalog of thousands of rows to a handful of round trips, and re-running
+the same payload is idempotent.
+
+Project writes also maintain project_tags, the tag -> project index behind
+the tech filters and facet counts of GET /api/projects (filter_projects).
+"""
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from models import CatalogVersion, Project, ProjectTag, Skill
+from schemas import ProjectCreate, SkillCreate
+
+# Rows per SELECT/INSERT/UPDATE round; stays well under SQLite's bound-parameter limit
+BULK_CHUNK_SIZE = 500
+
+# kind -> (model, create schema, natural key column)
+CATALOG_KINDS = {
+    "project": (Project, ProjectCreate, "title"),
+    "skill": (Skill, SkillCreate, "name"),
+}
+
+
+def chunked(items: Iterable, size: int = BULK_CHUNK_SIZE) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bulk_write(db: Session, kind: str, items: Iterable, upsert: bool = True) -> Dict[str, int]:
+    """
+    Write validated ProjectCreate/SkillCreate items without committing.
+    With upsert, rows whose key already exists are updated in place and
+    duplicate keys within the payload collapse to their last occurrence;
+    without it every item is inserted.
+    """
+    model, _, key = CATALOG_KINDS[kind]
+    key_column = getattr(model, key)
+    counts = {"inserted": 0, "updated": 0}
+    for chunk in chunked(items):
+        rows = [item.model_dump() for item in chunk]
+        if upsert:
+            by_key = {row[key]: row for row in rows}
+            existing = dict(db.execute(select(key_column, model.id).where(key_column.in_(by_key))).all())
+            new_rows = [row for k, row in by_key.items() if k not in existing]
+            changed_rows = [{"id": existing[k], **row} for k, row in by_key.items() if k in existing]
+        else:
+            new_rows, changed_rows = rows, []
+
+        new_ids = []
+        if new_rows:
+            # RETURNING over executemany; ids come back in parameter order
+            new_ids = db.scalars(
+                insert(model).returning(model.id, sort_by_parameter_order=True), new_rows
+            ).all()
+        if changed_rows:
+            # ORM bulk UPDATE by primary key: a single executemany
+            db.execute(update(model), changed_rows)
+        if kind == "project":
+            tech_stacks = {row["id"]: row["tech_stack"] for row in changed_rows}
+            tech_stacks.update((id_, row["tech_stack"]) for id_, row in zip(new_ids, new_rows))
+            sync_project_tags(db, tech_stacks)
+        counts["inserted"] += len(new_rows)
+        counts["updated"] += len(changed_rows)
+    if counts["inserted"] or counts["updated"]:
+        bump_catalog_version(db, model.__tablename__)
+    return counts
+
+
+def bump_catalog_version(db: Session, table: str) -> None:
+    """Count a write to a catalog table, in the caller's transaction"""
+    bumped = db.execute(
+        update(CatalogVersion).where(CatalogVersion.name == table)
+        .values(version=CatalogVersion.version + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not bumped:
+        db.execute(insert(CatalogVersion).values(name=table, version=1))
+
+
+def tag_key(tag: str) -> str:
+    return tag.strip().lower()
+
+
+def sync_project_tags(db: Session, tech_stacks: Dict[int, List[str]]) -> None:
+    """Replace the project_tags rows of each project id with its tech_stack"""
+    if not tech_stacks:
+        return
+    db.execute(delete(ProjectTag).where(ProjectTag.project_id.in_(tech_stacks)))
+    rows = []
+    for project_id, tech_stack in tech_stacks.items():
+        seen = set()
+        for tag in tech_stack or []:
+            key = tag_key(tag)
+            if key and key not in seen:
+                seen.add(key)
+                rows.append({"project_id": project_id, "tag_key": key, "tag": tag.strip()})
+    if rows:
+        db.execute(insert(ProjectTag), rows)
+
+
+def backfill_project_tags(db: Session) -> int:
+    """
+    Build project_tags for databases created before it existed.
+    A no-op once any tag row exists; returns the number of projects indexed.
+    """
+    if db.execute(select(ProjectTag.project_id).limit(1)).first() is not None:
+        return 0
+    indexed = 0
+    for chunk in chunked(db.execute(select(Project.id, Project.tech_stack)).all()):
+        sync_project_tags(db, dict(chunk))
+        indexed += len(chunk)
+    db.commit()
+    return indexed
+
+
+def filter_projects(
+    db: Session,
+    tech: List[str],
+    match_all: bool = True,
+    q: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> dict:
+    """
+    One page of projects having all (or any) of the tech tags and, with q,
+    containing it in the title or description. Also returns the total and
+    per-tag counts over the whole filtered set, both computed in SQL.
+    """
+    matching = select(Project.id)
+    keys = sorted({tag_key(t) for t in tech if tag_key(t)})
+    if keys:
+        tagged = select(ProjectTag.project_id).where(ProjectTag.tag_key.in_(keys))
+        if match_all:
+            tagged = tagged.group_by(ProjectTag.project_id).having(
+                func.count(ProjectTag.tag_key) == len(keys)
+            )
+        matching = matching.where(Project.id.in_(tagged))
+    if q:
+        pattern = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        matching = matching.where(or_(
+            Project.title.ilike(pattern, escape="\\"),
+            Project.description.ilike(pattern, escape="\\"),
+        ))
+    matching = matching.subquery()
+
+    total = db.scalar(select(func.count()).select_from(matching))
+    items = db.scalars(
+        select(Project).where(Project.id.in_(select(matching.c.id)))
+        .order_by(Project.id).limit(limit).offset(offset)
+    ).all()
+    facets = db.execute(
+        select(func.min(ProjectTag.tag), func.count())
+        .where(ProjectTag.project_id.in_(select(matching.c.id)))
+        .group_by(ProjectTag.tag_key)
+        .order_by(func.count().desc(), ProjectTag.tag_key)
+    ).all()
+    return {
+        "items": items,
+        "total": total,
+        "facets": [{"tag": tag, "count": count} for tag, count in facets],
+    }
+
+
+def read_fixture(path: Path) -> Iterator[Tuple[str, dict]]:
+    """
+    Yield (kind, fields) from a catalog fixture. Either JSON,
+    {"projects": [...], "skills": [...]}, or NDJSON with one object per line
+    carrying a "kind" of "project" or "skill". NDJSON is streamed, so the
+    file is never loaded whole.
+    """
+    if path.suffix in (".ndjson", ".jsonl"):
+        with path.open(encoding="utf-8") as fixture:
+            for line_number, line in enumerate(fixture, 1):
+                if not line.strip():
+                    continue
+                fields = json.loads(line)
+                kind = fields.pop("kind", None)
+                if kind not in CATALOG_KINDS:
+                    raise ValueError(f"{path}:{line_number}: unknown kind {kind!r}")
+                yield kind, fields
+        return
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    for kind in CATALOG_KINDS:
+        for fields in data.get(f"{kind}s", []):
+            yield kind, fields
+
+
+def load_fixture(db: Session, path: Path, upsert: bool = True) -> Dict[str, Dict[str, int]]:
+    """Validate and bulk-write a fixture in one transaction; returns counts per kind"""
+    totals = {kind: {"inserted": 0, "updated": 0} for kind in CATALOG_KINDS}
+    for chunk in chunked(read_fixture(path)):
+        batches: Dict[str, List] = {kind: [] for kind in CATALOG_KINDS}
+        for kind, fields in chunk:
+            batches[kind].append(CATALOG_KINDS[kind][1](**fields))
+        for kind, items in batches.items():
+            for name, count in bulk_write(db, kind, items, upsert).items():
+                totals[kind][name] += count
+    db.commit()
+    return totals
@@ -0,0 +1,253 @@
+"""
+Response compression (brotli or gzip, chosen by Accept-Encoding).
+
+CompressionMiddleware is pure ASGI:
+- bodies under COMPRESSION_MIN_BYTES, non-text types and responses that
+  already carry a Content-Encoding pass through untouched
+- single-body responses are compressed whole. When the response has a
+  strong ETag (the catalog snapshot, cached reads), the compressed bytes
+  are kept in a bounded LRU keyed by (ETag, encoding), so a hot body is
+  compressed once per worker, not once per request
+- streamed responses (exports) are compressed chunk by chunk and flushed
+  after each one, so the client keeps receiving data as it is produced
+
+A compressed response is not byte-identical to the identity body, so a
+strong ETag gets a per-encoding suffix ("<hash>-br", "<hash>-gz") and
+stays strong; weak ETags pass through as they are. cache.etag_matches
+ignores the suffix, so If-None-Match revalidation works whichever
+representation the client cached.
+
+brotli is optional; without it only gzip is offered.
+"""
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from cache import ETAG_ENCODING_SUFFIXES
+from metrics import compression_bytes, compression_cache, compression_duration
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone still covers every browser
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# Quality for one-off bodies; cached bodies are compressed once, so they get more effort
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_BROTLI_CACHED_QUALITY = int(os.getenv("COMPRESSION_BROTLI_CACHED_QUALITY", "11"))
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(8 * 1024 * 1024)))
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript",
+    "application/xml", "image/svg+xml", "text/",
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """'br' or 'gzip' if the client accepts it (q > 0), else None"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    if encoding == "br":
+        quality = COMPRESSION_BROTLI_CACHED_QUALITY if cached else COMPRESSION_BROTLI_QUALITY
+        return brotli.compress(body, quality=quality)
+    compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    """Incremental compressor that flushes after every chunk"""
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+            self._chunk = lambda data: self._compressor.process(data) + self._compressor.flush()
+            self._finish = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._chunk = lambda data: self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._compressor.flush
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._chunk(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (strong ETag, encoding), bounded by total bytes"""
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[str, str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.size, "max_bytes": self.max_bytes}
+
+
+compressed_cache = CompressedBodyCache()
+
+
+def is_compressible(headers: dict) -> bool:
+    if b"content-encoding" in headers:
+        return False
+    content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def encoding_etag(etag: bytes, encoding: str) -> bytes:
+    """The strong ETag of the compressed representation; weak ones are kept"""
+    if etag.startswith(b"W/") or not etag.endswith(b'"'):
+        return etag
+    return etag[:-1] + ETAG_ENCODING_SUFFIXES[encoding].encode() + b'"'
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware: negotiates and applies response compression"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = dict(scope["headers"])
+        encoding = choose_encoding(request_headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        streamer: Optional[StreamCompressor] = None
+        cacheable = scope["method"] in ("GET", "HEAD")
+
+        def route() -> str:
+            return getattr(scope.get("route"), "path", "unmatched")
+
+        async def send_wrapper(message):
+            nonlocal start, streamer
+            if message["type"] == "http.response.start":
+                start = message
+                if start["status"] == 304:
+                    # Echo the validator of the representation the client holds
+                    if_none_match = request_headers.get(b"if-none-match", b"")
+                    headers = []
+                    for key, value in start["headers"]:
+                        if key == b"etag" and encoding_etag(value, encoding) in if_none_match:
+                            value = encoding_etag(value, encoding)
+                        headers.append((key, value))
+                    await send({**start, "headers": headers + [(b"vary", b"Accept-Encoding")]})
+                    start = None
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if streamer is not None:
+                await self._send_stream_chunk(send, streamer, body, more_body, route(), encoding)
+                return
+
+            headers = dict(start["headers"])
+            if not is_compressible(headers) or (not more_body and len(body) < self.minimum_size):
+                await send(start)
+                start = None
+                await send(message)
+                return
+
+            if more_body:
+                # Streamed response: compress chunk by chunk from here on
+                streamer = StreamCompressor(encoding)
+                await send({**start, "headers": self._headers(start["headers"], encoding, None)})
+                await self._send_stream_chunk(send, streamer, body, more_body, route(), encoding)
+                return
+
+            etag = headers.get(b"etag")
+            cache_key = (etag.decode("latin-1"), encoding) if cacheable and etag and not etag.startswith(b"W/") else None
+            compressed = compressed_cache.get(cache_key) if cache_key else None
+            if compressed is not None:
+                compression_cache.inc("hit")
+            else:
+                started = time.perf_counter()
+                compressed = compress(body, encoding, cached=cache_key is not None)
+                compression_duration.observe(time.perf_counter() - started, route(), encoding)
+                if cache_key:
+                    compression_cache.inc("miss")
+                    compressed_cache.put(cache_key, compressed)
+            compression_bytes.inc(route(), encoding, "in", amount=len(body))
+            compression_bytes.inc(route(), encoding, "out", amount=len(compressed))
+            await send({**start, "headers": self._headers(start["headers"], encoding, len(compressed))})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_stream_chunk(self, send, streamer: StreamCompressor, body: bytes, more_body: bool,
+                                 route: str, encoding: str) -> None:
+        started = time.perf_counter()
+        data = streamer.chunk(body) if body else b""
+        if not more_body:
+            data += streamer.finish()
+        compression_duration.observe(time.perf_counter() - started, route, encoding)
+        compression_bytes.inc(route, encoding, "in", amount=len(body))
+        compression_bytes.inc(route, encoding, "out", amount=len(data))
+        await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    @staticmethod
+    def _headers(raw_headers, encoding: str, length: Optional[int]) -> list:
+        headers = []
+        for key, value in raw_headers:
+            if key == b"content-length":
+                continue
+            if key == b"etag":
+                value = encoding_etag(value, encoding)
+            headers.append((key, value))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return headers
@@ -1,10 +1,20 @@
+import logging
 import os
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
+from logs import setup_logging
+
+# database is the first project module every entry point (main, seed, outbox)
+# imports, so .env is loaded and logging is set up here, once per process
 load_dotenv()
+setup_logging()
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -12,25 +22,233 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     # Use SQLite file in the current directory
     DATABASE_URL = "sqlite:///./portfolio.db"
-    print("⚠️  No DATABASE_URL set. Using local SQLite database: portfolio.db")
+    logger.warning("No DATABASE_URL set. Using local SQLite database: portfolio.db", extra={"event": "db.default_sqlite"})
 
 # Handle postgres:// vs postgresql:// (some providers use postgres://)
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# SQLite needs special connect_args
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Optional read replica for the public read-only routes; empty = read from the primary
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+if DATABASE_READ_URL.startswith("postgres://"):
+    DATABASE_READ_URL = DATABASE_READ_URL.replace("postgres://", "postgresql://", 1)
+# After a catalog write, this worker reads from the primary for this long;
+# keep it above the replica's usual lag
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Named tuning profiles, picked with DB_PROFILE. SQLite settings become
+# PRAGMAs on every new connection; PostgreSQL settings are pool arguments.
+DB_PROFILES = {
+    # Driver defaults: rollback journal, synchronous=FULL, default pool
+    "legacy": {"sqlite": {}, "postgresql": {}},
+    # WAL lets readers run alongside the single writer; NORMAL skips the
+    # per-commit fsync of the WAL (durable across app crashes, not power loss)
+    "balanced": {
+        "sqlite": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -16000,  # negative = KiB, so 16 MB
+            "mmap_size": 64 * 1024 * 1024,
+            "temp_store": "MEMORY",
+        },
+        "postgresql": {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": True, "pool_recycle": 1800},
+    },
+    "throughput": {
+        "sqlite": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 10000,
+            "cache_size": -64000,
+            "mmap_size": 256 * 1024 * 1024,
+            "temp_store": "MEMORY",
+            "wal_autocheckpoint": 4000,
+        },
+        "postgresql": {"pool_size": 20, "max_overflow": 20, "pool_pre_ping": True, "pool_recycle": 1800},
+    },
+    # fsync on every commit; for hosts where losing the last commits on power loss is unacceptable
+    "durable": {
+        "sqlite": {
+            "journal_mode": "WAL",
+            "synchronous": "FULL",
+            "busy_timeout": 5000,
+            "cache_size": -16000,
+        },
+        "postgresql": {"pool_size": 5, "max_overflow": 10, "pool_pre_ping": True, "pool_recycle": 1800},
+    },
+    # Few, short-lived connections for scale-to-zero hosts and managed
+    # Postgres that drops idle connections
+    "serverless": {
+        "sqlite": {"journal_mode": "WAL", "synchronous": "NORMAL", "busy_timeout": 5000},
+        "postgresql": {"pool_size": 2, "max_overflow": 3, "pool_pre_ping": True, "pool_recycle": 300},
+    },
+}
+
+DB_PROFILE = os.getenv("DB_PROFILE", "balanced")
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE '{DB_PROFILE}'. Choose one of: {', '.join(DB_PROFILES)}")
+
+
+def apply_sqlite_pragmas(engine, pragmas: dict):
+    """Run the profile's PRAGMAs on each new DBAPI connection of engine"""
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+
+def pool_options(url: str, profile: str) -> dict:
+    """Pool keyword arguments for url under the named profile (none for SQLite)"""
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return {}
+    return dict(DB_PROFILES[profile].get(backend, {}))
+
+
+def create_tuned_engine(url: str, profile: str = DB_PROFILE, **kwargs):
+    """Sync engine with the profile's pool settings or PRAGMAs applied"""
+    options = pool_options(url, profile)
+    if url.startswith("sqlite"):
+        # SQLite needs special connect_args
+        options["connect_args"] = {"check_same_thread": False}
+    engine = create_engine(url, **options, **kwargs)
+    if engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine, DB_PROFILES[profile]["sqlite"])
+    return engine
+
+
+engine = create_tuned_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Separate engine (and pool) for public reads, so they don't queue for the
+# primary's connections behind writes and admin queries
+read_engine = create_tuned_engine(DATABASE_READ_URL) if DATABASE_READ_URL else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+_last_primary_write = float("-inf")
+
+
+def mark_primary_write() -> None:
+    """Record a write this worker's next reads must see (read-your-writes)"""
+    global _last_primary_write
+    _last_primary_write = time.monotonic()
+
+
+def read_session_factory():
+    """The replica's sessionmaker, or the primary's within READ_YOUR_WRITES_SECONDS of a write"""
+    if read_engine is engine or time.monotonic() - _last_primary_write < READ_YOUR_WRITES_SECONDS:
+        return SessionLocal
+    return ReadSessionLocal
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync database URL onto its async driver:
+    sqlite -> aiosqlite, postgresql -> asyncpg.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        # asyncpg doesn't understand libpq's sslmode query parameter
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode:
+            query["ssl"] = sslmode
+        return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+    return url
+
+
+def create_tuned_async_engine(url: str, profile: str = DB_PROFILE, **kwargs):
+    """Async counterpart of create_tuned_engine; url is the sync URL"""
+    async_engine = create_async_engine(to_async_url(url), **pool_options(url, profile), **kwargs)
+    if async_engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(async_engine.sync_engine, DB_PROFILES[profile]["sqlite"])
+    return async_engine
+
+
+# Async engine for routes that run on the event loop (messages, admin)
+async_engine = create_tuned_async_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 Base = declarative_base()
 
 
+# Production deploys that manage the schema themselves can skip the
+# create_all / index checks at startup
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "true").lower() == "true"
+
+
+def init_db():
+    """
+    Create missing tables, plus indexes added to tables that already exist
+    (create_all skips indexes on tables it doesn't create itself).
+    """
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+class LazySession:
+    """
+    Stands in for a Session and only creates the real one on first use,
+    so requests that never touch the database (e.g. cache hits) skip it.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._session = None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    @property
+    def started(self) -> bool:
+        return self._session is not None
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+class LazyAsyncSession(LazySession):
+    """LazySession for AsyncSession factories"""
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
 def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
+    """Dependency to get database session (opened lazily)"""
+    db = LazySession(SessionLocal)
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Dependency for read-only routes: a session on the read replica (opened lazily)"""
+    db = LazySession(read_session_factory())
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session (opened lazily)"""
+    db = LazyAsyncSession(AsyncSessionLocal)
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -2,24 +2,45 @@
 Email configuration for contact form notifications.
 Uses Resend API for reliable email delivery on cloud platforms.
 Falls back to SMTP if Resend is not configured.
+
+Provider clients and the template are built on first use, not at import,
+so they stay off the cold-start path.
 """
+import asyncio
+import logging
 import os
+import time
+from functools import lru_cache
 from pathlib import Path
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, List, Optional
+
+from metrics import email_send_duration, email_send_failures
+
+if TYPE_CHECKING:
+    from jinja2 import Template
 
-# Load environment variables before accessing them
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
 
 # Check which email provider to use
 RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
 USE_RESEND = bool(RESEND_API_KEY)
 
-if USE_RESEND:
+
+@lru_cache(maxsize=None)
+def get_resend():
+    """The resend module, configured with the API key"""
     import resend
     resend.api_key = RESEND_API_KEY
-    print("📧 Using Resend API for email delivery")
-else:
-    from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+    logger.info("Using Resend API for email delivery", extra={"event": "email.provider", "provider": "resend"})
+    return resend
+
+
+@lru_cache(maxsize=None)
+def get_fastmail():
+    """FastMail client for the SMTP fallback"""
+    from fastapi_mail import FastMail, ConnectionConfig
     
     # SMTP configuration (fallback)
     mail_port = int(os.getenv("MAIL_PORT", "465"))
@@ -36,10 +57,10 @@ else:
         MAIL_SSL_TLS=use_ssl,
         USE_CREDENTIALS=True,
         VALIDATE_CERTS=True,
-        TEMPLATE_FOLDER=Path(__file__).parent / "templates",
+        TEMPLATE_FOLDER=TEMPLATE_DIR,
     )
-    fm = FastMail(conf)
-    print("📧 Using SMTP for email delivery")
+    logger.info("Using SMTP for email delivery", extra={"event": "email.provider", "provider": "smtp"})
+    return FastMail(conf)
 
 
 def is_email_configured() -> bool:
@@ -49,120 +70,111 @@ def is_email_configured() -> bool:
     return bool(os.getenv("MAIL_USERNAME") and os.getenv("MAIL_PASSWORD"))
 
 
-async def send_contact_notification(
-    name: str,
-    email: str,
-    message: str,
-    ip_address: str,
-) -> bool:
+@lru_cache(maxsize=None)
+def get_contact_template() -> "Template":
+    """Compile templates/email.html once; autoescape keeps message HTML inert"""
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATE_DIR),
+        autoescape=select_autoescape(["html"]),
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    return env.get_template("email.html")
+
+
+def render_contact_email(messages: List[dict]) -> str:
     """
-    Send email notification for new contact form submission.
+    Render one or more contact messages into the notification HTML.
+    Each dict needs name, email, message and ip_address keys.
+    """
+    return get_contact_template().render(messages=messages)
+
+
+async def deliver_email(subject: str, html_content: str, reply_to: Optional[str] = None) -> bool:
+    """
+    Send rendered HTML to the site owner through the configured provider.
     Returns True if sent successfully, False otherwise.
     """
     if not is_email_configured():
-        print("⚠️  Email not configured. Skipping notification.")
+        logger.warning("Email not configured. Skipping notification.", extra={"event": "email.not_configured"})
         return False
 
     recipient = os.getenv("MAIL_TO", os.getenv("MAIL_FROM", ""))
     if not recipient:
-        print("⚠️  No recipient email configured.")
+        logger.warning("No recipient email configured.", extra={"event": "email.no_recipient"})
         return False
 
     sender_email = os.getenv("MAIL_FROM", "onboarding@resend.dev")
     sender_name = os.getenv("MAIL_FROM_NAME", "Portfolio Contact")
 
-    # Build HTML content - Professional design matching original template
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="utf-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>New Portfolio Message</title>
-    </head>
-    <body style="margin: 0; padding: 0; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; background-color: #f5f5f5;">
-        <table role="presentation" width="100%" cellspacing="0" cellpadding="0" style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 12px; overflow: hidden; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);">
-            <!-- Header with gradient -->
-            <tr>
-                <td style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 40px 30px; text-align: center;">
-                    <h1 style="margin: 0; color: #ffffff; font-size: 24px; font-weight: 600;">
-                        📬 New Portfolio Message
-                    </h1>
-                </td>
-            </tr>
-            
-            <!-- Content -->
-            <tr>
-                <td style="padding: 30px;">
-                    <!-- From -->
-                    <div style="margin-bottom: 20px;">
-                        <label style="display: block; color: #6366f1; font-size: 12px; font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 8px;">FROM</label>
-                        <div style="background-color: #f9fafb; padding: 12px 16px; border-radius: 8px; border: 1px solid #e5e7eb;">
-                            {name}
-                        </div>
-                    </div>
-                    
-                    <!-- Email -->
-                    <div style="margin-bottom: 20px;">
-                        <label style="display: block; color: #6366f1; font-size: 12px; font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 8px;">EMAIL</label>
-                        <div style="background-color: #f9fafb; padding: 12px 16px; border-radius: 8px; border: 1px solid #e5e7eb;">
-                            <a href="mailto:{email}" style="color: #3b82f6; text-decoration: none;">{email}</a>
-                        </div>
-                    </div>
-                    
-                    <!-- Message -->
-                    <div style="margin-bottom: 20px;">
-                        <label style="display: block; color: #6366f1; font-size: 12px; font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 8px;">MESSAGE</label>
-                        <div style="background-color: #f9fafb; padding: 16px; border-radius: 8px; border-left: 4px solid #a3e635; border-top: 1px solid #e5e7eb; border-right: 1px solid #e5e7eb; border-bottom: 1px solid #e5e7eb;">
-                            <p style="margin: 0; white-space: pre-wrap; line-height: 1.6;">{message}</p>
-                        </div>
-                    </div>
-                    
-                    <!-- IP Address -->
-                    <div style="background-color: #fef9c3; padding: 12px 16px; border-radius: 8px; margin-top: 20px;">
-                        <span style="color: #ca8a04;">🌐 Sender IP: {ip_address}</span>
-                    </div>
-                </td>
-            </tr>
-            
-            <!-- Footer -->
-            <tr>
-                <td style="padding: 20px 30px; text-align: center; border-top: 1px solid #e5e7eb;">
-                    <p style="margin: 0; color: #9ca3af; font-size: 13px;">
-                        Sent from your Portfolio Contact Form
-                    </p>
-                </td>
-            </tr>
-        </table>
-    </body>
-    </html>
-    """
-
+    provider = "resend" if USE_RESEND else "smtp"
+    started = time.perf_counter()
     try:
         if USE_RESEND:
             # Use Resend API
             params = {
                 "from": f"{sender_name} <{sender_email}>",
                 "to": [recipient],
-                "subject": f"Portfolio Contact: {name}",
+                "subject": subject,
                 "html": html_content,
-                "reply_to": email,
             }
-            result = resend.Emails.send(params)
-            print(f"✓ Email sent via Resend. ID: {result.get('id', 'unknown')}")
+            if reply_to:
+                params["reply_to"] = reply_to
+            # The Resend SDK is synchronous; keep it off the event loop
+            result = await asyncio.to_thread(get_resend().Emails.send, params)
+            email_send_duration.observe(time.perf_counter() - started, provider, "sent")
+            logger.info("Email sent via Resend", extra={"event": "email.sent", "provider": provider, "email_id": result.get("id")})
             return True
         else:
             # Use SMTP (fastapi-mail)
+            from fastapi_mail import MessageSchema, MessageType
+
             message_schema = MessageSchema(
-                subject=f"Portfolio Contact: {name}",
+                subject=subject,
                 recipients=[recipient],
                 body=html_content,
                 subtype=MessageType.html,
+                reply_to=[reply_to] if reply_to else [],
             )
-            await fm.send_message(message_schema)
-            print(f"✓ Email notification sent via SMTP for message from {email}")
+            await get_fastmail().send_message(message_schema)
+            email_send_duration.observe(time.perf_counter() - started, provider, "sent")
+            logger.info("Email sent via SMTP", extra={"event": "email.sent", "provider": provider, "subject": subject})
             return True
             
     except Exception as e:
-        print(f"✗ Failed to send email: {e}")
+        email_send_duration.observe(time.perf_counter() - started, provider, "failed")
+        email_send_failures.inc(provider)
+        logger.warning("Failed to send email: %s", e, extra={"event": "email.failed", "provider": provider})
         return False
+
+
+async def send_contact_notification(
+    name: str,
+    email: str,
+    message: str,
+    ip_address: str,
+) -> bool:
+    """
+    Send email notification for new contact form submission.
+    Returns True if sent successfully, False otherwise.
+    """
+    html_content = render_contact_email([{
+        "name": name,
+        "email": email,
+        "message": message,
+        "ip_address": ip_address,
+    }])
+    return await deliver_email(f"Portfolio Contact: {name}", html_content, reply_to=email)
+
+
+async def send_contact_digest(messages: List[dict]) -> bool:
+    """
+    Send several contact messages as a single summary email.
+    Returns True if sent successfully, False otherwise.
+    """
+    if len(messages) == 1:
+        return await send_contact_notification(**messages[0])
+    html_content = render_contact_email(messages)
+    return await deliver_email(f"Portfolio Contact: {len(messages)} new messages", html_content)
@@ -0,0 +1,201 @@
+"""
+Group commit for contact-message inserts.
+
+On SQLite every commit takes the single writer lock and syncs the WAL, so
+a burst of submissions that each commit on their own queue up behind one
+another. With GROUP_COMMIT_ENABLED=true, create_message hands its row to
+MessageWriter instead: rows are collected for up to
+GROUP_COMMIT_INTERVAL_MS (or until GROUP_COMMIT_MAX_BATCH are waiting) and
+written, with their outbox rows, in one transaction. Each request resumes
+with its assigned id only after that transaction has committed, so a
+success response still means the message is stored.
+
+If a batch fails, its rows are retried one transaction each, so a single
+bad row fails only its own request. The writer runs inside each API
+process; without it (disabled, or not started) create_message commits
+per request as before.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional
+
+from sqlalchemy import insert
+
+from database import AsyncSessionLocal
+from metrics import group_commit_batch_size, group_commit_duration
+from models import EmailOutbox, Message
+
+logger = logging.getLogger(__name__)
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "false").lower() == "true"
+# Longest a row waits for company before its batch is written; 0 writes
+# whatever queued up while the previous batch was committing
+GROUP_COMMIT_INTERVAL_MS = float(os.getenv("GROUP_COMMIT_INTERVAL_MS", "5"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "100"))
+
+
+def iter_nowait(queue: asyncio.Queue):
+    while not queue.empty():
+        yield queue.get_nowait()
+
+
+def fail_pending(items) -> None:
+    """Fail the futures of rows whose outcome is unknown, so no request waits forever"""
+    for item in items:
+        if not item.future.done():
+            item.future.set_exception(RuntimeError("Message writer stopped before confirming the insert"))
+
+
+class PendingMessage:
+    """A queued row and the future its request waits on"""
+
+    __slots__ = ("fields", "queue_email", "future")
+
+    def __init__(self, fields: dict, queue_email: bool, future: asyncio.Future):
+        self.fields = fields
+        self.queue_email = queue_email
+        self.future = future
+
+
+class MessageWriter:
+    """Batches Message (and EmailOutbox) inserts into shared transactions"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        interval: float = GROUP_COMMIT_INTERVAL_MS / 1000,
+        max_batch: int = GROUP_COMMIT_MAX_BATCH,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Rows taken off the queue for the batch being assembled or written
+        self._batch: List[PendingMessage] = []
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Write what is already queued, then stop"""
+        if not self.running:
+            return
+        self._stopping = True
+        self._queue.put_nowait(None)
+        await self._task
+
+    async def submit(self, fields: dict, queue_email: bool = False):
+        """Queue one message; returns its (id, created_at) row once committed"""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(PendingMessage(fields, queue_email, future))
+        # Shielded: a client hanging up must not cancel a row already in a batch
+        return await asyncio.shield(future)
+
+    async def run(self) -> None:
+        try:
+            await self._run()
+        finally:
+            # Cancelled or crashed: nothing will write what is still queued
+            fail_pending(self._batch)
+            fail_pending([item for item in iter_nowait(self._queue) if item is not None])
+            self._batch = []
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            batch = self._batch = [first]
+            deadline = loop.time() + self.interval
+            while len(batch) < self.max_batch:
+                try:
+                    if self._queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    else:
+                        item = self._queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self.flush(batch)
+            self._batch = []
+        # Rows submitted while the stop sentinel was already queued
+        leftovers = [item for item in iter_nowait(self._queue) if item is not None]
+        if leftovers:
+            await self.flush(leftovers)
+
+    async def flush(self, batch: List[PendingMessage]) -> None:
+        try:
+            await self._flush(batch)
+        finally:
+            # A cancellation (forced shutdown) skips both result paths of _flush
+            fail_pending(batch)
+
+    async def _flush(self, batch: List[PendingMessage]) -> None:
+        started = time.perf_counter()
+        try:
+            rows = await self._write(batch)
+        except Exception as exc:
+            if len(batch) == 1:
+                logger.exception("Message insert failed", extra={"event": "group_commit.failed"})
+                if not batch[0].future.done():
+                    batch[0].future.set_exception(exc)
+                return
+            logger.warning("Batch insert failed, retrying rows one by one", exc_info=True, extra={
+                "event": "group_commit.batch_failed", "rows": len(batch),
+            })
+            for item in batch:
+                await self._flush([item])
+            return
+        group_commit_duration.observe(time.perf_counter() - started)
+        group_commit_batch_size.observe(len(batch))
+        self.batches += 1
+        self.rows += len(batch)
+        for item, row in zip(batch, rows):
+            if not item.future.done():
+                item.future.set_result(row)
+
+    async def _write(self, batch: List[PendingMessage]) -> list:
+        async with self.session_factory() as db:
+            rows = (await db.execute(
+                insert(Message).returning(Message.id, Message.created_at, sort_by_parameter_order=True),
+                [item.fields for item in batch],
+            )).all()
+            outbox = [{"message_id": row.id} for item, row in zip(batch, rows) if item.queue_email]
+            if outbox:
+                await db.execute(insert(EmailOutbox), outbox)
+            await db.commit()
+        return rows
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.running,
+            "interval_ms": self.interval * 1000,
+            "max_batch": self.max_batch,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch": round(self.rows / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+message_writer = MessageWriter()
@@ -0,0 +1,211 @@
+"""
+Responsive variants of locally stored project images.
+
+A Project.image_url like "/ddos-project.png" names a file in
+IMAGE_SOURCE_DIR (the frontend's public/ folder by default).
+GET /api/images/ddos-project.png?w=640 serves that image resized to one of
+IMAGE_WIDTHS, as AVIF or WebP depending on the Accept header, and
+ProjectResponse.image_srcset lists those URLs for the browser to pick from.
+
+Variants are encoded in a process pool, off the event loop and outside
+the GIL, and written to IMAGE_CACHE_DIR under a name made of the source's
+content hash, the width and the format. Later requests, from any worker,
+are served straight from disk. An edited source hashes differently, so it
+gets fresh variants. Concurrent requests for the same missing variant
+share one encode.
+
+Pillow is optional: without it the endpoint returns 503 and projects
+advertise no srcset. It is imported on first use, not at startup.
+"""
+import asyncio
+import hashlib
+import importlib.util
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+IMAGE_SOURCE_DIR = Path(os.getenv(
+    "IMAGE_SOURCE_DIR", Path(__file__).resolve().parent.parent / "nextjs-frontend" / "public"
+)).resolve()
+IMAGE_CACHE_DIR = Path(os.getenv("IMAGE_CACHE_DIR", "image-cache"))
+IMAGE_WIDTHS = sorted(int(w) for w in os.getenv("IMAGE_WIDTHS", "320,640,960,1280").split(","))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "75"))
+# Encoder processes; each encode keeps one CPU busy for tens of milliseconds
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# Browser cache lifetime of a variant (revalidated by ETag afterwards)
+IMAGE_MAX_AGE_SECONDS = int(os.getenv("IMAGE_MAX_AGE_SECONDS", "86400"))
+
+# Optional: without Pillow, images are served as-is by the frontend
+IMAGES_ENABLED = importlib.util.find_spec("PIL") is not None
+SOURCE_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+# Preferred first; only those this Pillow build can encode are offered
+VARIANT_FORMATS = ("avif", "webp")
+
+
+@lru_cache(maxsize=None)
+def variant_formats() -> List[str]:
+    if not IMAGES_ENABLED:
+        return []
+    from PIL import features
+    return [fmt for fmt in VARIANT_FORMATS if features.check(fmt)]
+
+
+def unreadable_image_errors() -> Tuple[type, ...]:
+    """
+    Exceptions meaning a source can't be turned into a variant: unreadable,
+    a decompression bomb, or an encoder process that died on it
+    """
+    from PIL import Image
+    return OSError, Image.DecompressionBombError, BrokenProcessPool
+
+
+def negotiate_format(accept: str) -> Optional[str]:
+    """Best variant format the client accepts; WebP-less clients still get the last one"""
+    formats = variant_formats()
+    for fmt in formats:
+        if f"image/{fmt}" in accept:
+            return fmt
+    return formats[-1] if formats else None
+
+
+def resolve_source(path: str) -> Optional[Path]:
+    """The source file for an image_url path, or None if it isn't a local image"""
+    path = path.lstrip("/")
+    if not path or path.startswith("/"):
+        return None
+    source = (IMAGE_SOURCE_DIR / path).resolve()
+    if source.suffix.lower() not in SOURCE_SUFFIXES or not source.is_relative_to(IMAGE_SOURCE_DIR):
+        return None
+    return source if source.is_file() else None
+
+
+# path -> (mtime_ns, size, content hash, pixel width)
+_source_info: Dict[Path, Tuple[int, int, str, int]] = {}
+_source_lock = threading.Lock()
+
+
+def source_info(source: Path) -> Tuple[str, int]:
+    """(content hash, pixel width) of a source, re-read only when its stat changes"""
+    stat = source.stat()
+    cached = _source_info.get(source)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2], cached[3]
+    from PIL import Image
+
+    digest = hashlib.sha256(source.read_bytes()).hexdigest()[:20]
+    with Image.open(source) as image:
+        width = image.width
+    with _source_lock:
+        _source_info[source] = (stat.st_mtime_ns, stat.st_size, digest, width)
+    return digest, width
+
+
+def image_srcset(image_url: str) -> Optional[str]:
+    """srcset of /api/images variants for a local image_url; None for remote ones"""
+    if not IMAGES_ENABLED or not image_url.startswith("/") or image_url.startswith("//"):
+        return None
+    source = resolve_source(image_url)
+    if source is None:
+        return None
+    try:
+        _, source_width = source_info(source)
+    except unreadable_image_errors():
+        return None  # not a readable image
+    # Variants never upscale: the first width at or past the source's is the
+    # source size, and any larger ones would repeat it
+    entries = []
+    for w in IMAGE_WIDTHS:
+        entries.append((w, min(w, source_width)))
+        if w >= source_width:
+            break
+    path = quote(image_url.lstrip("/"))
+    return ", ".join(f"/api/images/{path}?w={w} {actual}w" for w, actual in entries)
+
+
+def render_variant(source: str, dest: str, width: int, fmt: str, quality: int) -> None:
+    """Resize and encode one variant (runs in a pool process); never upscales"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"):
+            transparent = "A" in image.getbands() or "transparency" in image.info
+            image = image.convert("RGBA" if transparent else "RGB")
+        # Write to a private name, then rename, so readers never see half a file
+        partial = f"{dest}.{os.getpid()}.tmp"
+        image.save(partial, format=fmt.upper(), quality=quality)
+    os.replace(partial, dest)
+
+
+class ImagePipeline:
+    """Content-addressed variant cache in front of a process pool"""
+
+    def __init__(self, cache_dir: Path = IMAGE_CACHE_DIR, workers: int = IMAGE_WORKERS):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.hits = 0
+        self.encoded = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[Path, asyncio.Future] = {}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def variant(self, source: Path, width: int, fmt: str) -> Path:
+        """Path of the cached variant, encoding it first if needed"""
+        digest, _ = await asyncio.to_thread(source_info, source)
+        dest = self.cache_dir / f"{digest}-{width}.{fmt}"
+        if dest.exists():
+            self.hits += 1
+            return dest
+        pending = self._pending.get(dest)
+        if pending is None:
+            pending = asyncio.ensure_future(self._encode(source, dest, width, fmt))
+            self._pending[dest] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(dest, None))
+            self.encoded += 1
+        # Shielded: a client hanging up must not cancel an encode others wait on
+        await asyncio.shield(pending)
+        return dest
+
+    async def _encode(self, source: Path, dest: Path, width: int, fmt: str) -> None:
+        pool = self._executor()
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                pool, render_variant, str(source), str(dest), width, fmt, IMAGE_QUALITY
+            )
+        except BrokenProcessPool:
+            # An encoder process died; later encodes get a fresh pool
+            if self._pool is pool:
+                self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": IMAGES_ENABLED,
+            "formats": variant_formats(),
+            "widths": IMAGE_WIDTHS,
+            "hits": self.hits,
+            "encoded": self.encoded,
+            "encoding": len(self._pending),
+        }
+
+
+image_pipeline = ImagePipeline()
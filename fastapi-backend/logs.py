@@ -0,0 +1,158 @@
+"""
+Structured, non-blocking logging.
+
+Application code logs through the standard logging module. Records are
+put on a bounded queue and written to stdout by a QueueListener thread,
+so a slow stdout (container log drivers, pipes) never stalls the event
+loop. When the queue is full, records are dropped and counted rather
+than waited on.
+
+- LOG_FORMAT=json (default) writes one JSON object per line; 'text' is
+  easier to read in a terminal
+- Pass a stable event name (extra={"event": ...}) to make records easy
+  to filter. Noisy events can be sampled with LOG_SAMPLE_RATES, e.g.
+  "spam.honeypot=0.1". Kept records carry their sample_rate, so counts
+  can be scaled back up.
+
+Dropped records are counted in log_records_dropped_total.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from metrics import log_records_dropped
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Records buffered for the writer thread before new ones are dropped
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "spam.honeypot=0.1,spam.near_duplicate=0.1")
+# Longest exit waits for the writer to flush what's queued
+LOG_FLUSH_TIMEOUT_SECONDS = 2.0
+# Libraries that log every HTTP call at INFO
+QUIET_LOGGERS = ("httpx", "httpcore")
+
+if LOG_FORMAT not in ("json", "text"):
+    raise ValueError("LOG_FORMAT must be 'json' or 'text'")
+
+# Attributes every LogRecord has; anything else came in through extra=
+RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """'event=rate,...' -> {event: rate}"""
+    rates = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, event, msg, extras, exc"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a random fraction of records per event name"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None:
+            return True
+        if random.random() >= rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve args and the traceback here, while they are still valid,
+        # but leave the (slower) formatting to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+
+class FlushingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() gives up after a timeout instead of hanging on a full queue"""
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        try:
+            self.queue.put(self._sentinel, timeout=LOG_FLUSH_TIMEOUT_SECONDS)
+        except queue.Full:
+            return  # the writer thread is a daemon; exit without it
+        self._thread.join(timeout=LOG_FLUSH_TIMEOUT_SECONDS)
+        self._thread = None
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[FlushingQueueListener] = None
+
+
+def setup_logging() -> None:
+    """Route the root logger through the queue; safe to call more than once"""
+    global _handler, _listener
+    if _handler is not None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler = DroppingQueueHandler(log_queue)
+    _handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES)))
+
+    output = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+    _listener = FlushingQueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # Flush what's queued when the process exits
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(LOG_LEVEL)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
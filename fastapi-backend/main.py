@@ -1,47 +1,178 @@
 """
 FastAPI backend for the developer portfolio.
-Features: Rate limiting, honeypot spam protection, shadowbanning, async email notifications.
+Features: Rate limiting, honeypot spam protection, shadowbanning, near-duplicate detection, async email notifications.
 """
+import asyncio
+import base64
+import json
+import logging
 import os
-from dotenv import load_dotenv
+import random
+from contextlib import asynccontextmanager
+from datetime import date, datetime
 
-# Load environment variables from .env file
-load_dotenv()
-
-from fastapi import FastAPI, Depends, HTTPException, Request, Header, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Request, Header, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from typing import List, Optional, Union
 
-from database import engine, get_db, Base
-from models import Project, Skill, Message, BlockedSender
+# Importing database loads environment variables from .env
+from database import (
+    init_db, get_db, get_read_db, get_async_db, engine, read_engine, async_engine, SessionLocal, AsyncSessionLocal,
+    DB_CREATE_SCHEMA, mark_primary_write,
+)
+from models import Project, Skill, Message, BlockedSender, EmailOutbox
 from schemas import (
-    ProjectCreate, ProjectResponse,
-    SkillResponse,
-    MessageCreate, MessageResponse,
+    ProjectCreate, ProjectResponse, ProjectPage,
+    SkillCreate, SkillResponse, BulkWriteResponse, BootstrapResponse,
+    MessageCreate, MessageResponse, MessagePage, MessageSearchPage,
     BlockSenderRequest, BlockedSenderResponse,
+    OutboxStatusResponse,
+)
+from email_service import is_email_configured
+from rate_limit import RateLimiter
+from outbox import outbox_worker, outbox_status, requeue_dead, EMAIL_WORKER_MODE
+from cache import response_cache, cached_response, etag_matches
+from catalog import bulk_write, backfill_project_tags, bump_catalog_version, filter_projects, sync_project_tags
+from snapshot import catalog_snapshot, serialize_bootstrap, serialize_catalog, CATALOG_SNAPSHOT, CATALOG_REFRESH_SECONDS
+from search import init_search, search_messages
+from retention import (
+    list_archives, read_archive, archive_path, retention_enabled, run_retention_once,
+    RETENTION_INTERVAL_SECONDS, RETENTION_STARTUP_DELAY_SECONDS,
 )
-from email_service import send_contact_notification, is_email_configured
+from export import EXPORT_COLUMNS, EXPORT_FORMATS, export_filename, gzip_chunks, stream_export
+from blocklist import blocklist, parse_network, format_network
+from spam import duplicate_index, SPAM_DUPLICATE_ACTION
+from images import (
+    image_pipeline, negotiate_format, resolve_source, unreadable_image_errors,
+    IMAGES_ENABLED, IMAGE_WIDTHS, IMAGE_MAX_AGE_SECONDS,
+)
+from compression import CompressionMiddleware, compressed_cache
+from profiling import ProfilingMiddleware, profile_store, PROFILING_ENABLED
+from group_commit import message_writer, GROUP_COMMIT_ENABLED
+from metrics import MetricsMiddleware, instrument_engine, registry, spam_blocked
+
+logger = logging.getLogger(__name__)
+
+# Seconds between blocklist reloads, so blocks made in other workers show up here
+BLOCKLIST_REFRESH_SECONDS = float(os.getenv("BLOCKLIST_REFRESH_SECONDS", "60"))
+
+
+async def load_blocklist():
+    """(Re)build the in-memory shadowban index from blocked_senders"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(BlockedSender.id, BlockedSender.email, BlockedSender.ip_address)
+        )
+        blocklist.load(result.all())
+
+
+async def refresh_blocklist_periodically():
+    while True:
+        await asyncio.sleep(BLOCKLIST_REFRESH_SECONDS)
+        try:
+            await load_blocklist()
+        except Exception:
+            logger.exception("Blocklist refresh failed", extra={"event": "blocklist.refresh_failed"})
+
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+def backfill_tags() -> None:
+    with SessionLocal() as db:
+        indexed = backfill_project_tags(db)
+    if indexed:
+        logger.info("Indexed tech tags for %d projects", indexed, extra={"event": "catalog.tags_backfilled"})
+
+
+def refresh_catalog_snapshot(force: bool = False) -> list:
+    """
+    Re-serialize the catalog snapshot; unless forced, only tables that changed.
+    Always reads the primary: a lagging replica would otherwise look like a
+    change and roll the snapshot back past writes already served from it.
+    The check itself is a few aggregate queries.
+    """
+    with SessionLocal() as db:
+        if force:
+            return catalog_snapshot.rebuild(db)
+        return catalog_snapshot.refresh_if_changed(db)
+
+
+async def refresh_catalog_periodically():
+    """Picks up catalog writes from seed.py and other workers"""
+    while True:
+        await asyncio.sleep(CATALOG_REFRESH_SECONDS)
+        try:
+            rebuilt = await asyncio.to_thread(refresh_catalog_snapshot)
+            if rebuilt:
+                logger.info("Catalog snapshot rebuilt", extra={"event": "catalog.snapshot_rebuilt", "keys": rebuilt})
+        except Exception:
+            logger.exception("Catalog snapshot refresh failed", extra={"event": "catalog.snapshot_failed"})
+
+
+async def run_retention_periodically():
+    """
+    First run shortly after startup, then every RETENTION_INTERVAL_SECONDS.
+    Workers that start together are spread out by the jitter; the one that
+    loses the retention lock just skips its run.
+    """
+    delay = RETENTION_STARTUP_DELAY_SECONDS * (1 + random.random())
+    while True:
+        await asyncio.sleep(delay)
+        delay = RETENTION_INTERVAL_SECONDS
+        try:
+            counts = await asyncio.to_thread(run_retention_once, SessionLocal, engine)
+            if counts.get("archived"):
+                logger.info("Archived %d expired messages", counts["archived"], extra={"event": "retention.run", **counts})
+        except Exception:
+            logger.exception("Retention run failed", extra={"event": "retention.failed"})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup work lives here, not at import, to keep cold starts short"""
+    logger.info("CORS allowed origins", extra={"event": "startup.cors", "origins": cors_origins})
+    if DB_CREATE_SCHEMA:
+        # Create tables, missing indexes and the search index; fill derived tables
+        await asyncio.to_thread(init_db)
+        await asyncio.to_thread(init_search, engine)
+        await asyncio.to_thread(backfill_tags)
+    await load_blocklist()
+    background = [asyncio.create_task(refresh_blocklist_periodically())]
+    if CATALOG_SNAPSHOT:
+        await asyncio.to_thread(refresh_catalog_snapshot, True)
+        background.append(asyncio.create_task(refresh_catalog_periodically()))
+    if retention_enabled() and RETENTION_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_retention_periodically()))
+    if EMAIL_WORKER_MODE == "embedded":
+        background.append(asyncio.create_task(outbox_worker.run()))
+    if GROUP_COMMIT_ENABLED:
+        message_writer.start()
+    yield
+    # Commit submissions still queued before the database goes away
+    await message_writer.stop()
+    # Rows left mid-send are retried once their lease expires
+    outbox_worker.stop()
+    image_pipeline.shutdown()
+    for task in background:
+        task.cancel()
+    # Let cancelled tasks unwind their sessions before the pools go away;
+    # otherwise an aiosqlite connection cancelled mid-call can hang shutdown
+    await asyncio.gather(*background, return_exceptions=True)
+    await async_engine.dispose()
+    engine.dispose()
+    if read_engine is not engine:
+        read_engine.dispose()
 
-# Rate limiter setup
-limiter = Limiter(key_func=get_remote_address)
 
 app = FastAPI(
     title="Dev Portfolio API",
     description="FastAPI backend for the developer portfolio",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
-# Add rate limiter to app state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS middleware - allow Next.js frontend
 # Build origins list, filtering out empty strings
 cors_origins = [
@@ -59,7 +190,18 @@ if frontend_url:
     # Also allow without trailing slash
     cors_origins.append(frontend_url.rstrip("/"))
 
-print(f"📋 CORS allowed origins: {cors_origins}")
+# Time every SQL statement on every engine, charged to the current request
+instrument_engine(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine)
+instrument_engine(async_engine.sync_engine)
+# Innermost, so a profile covers the route and the SQL it runs. authorize is
+# looked up per request because it is defined with the admin routes below.
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, authorize=lambda request: authorize_profiling(request))
+# Compression sits inside the metrics middleware, so route latency includes it
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -83,24 +225,63 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-def is_sender_blocked(db: Session, email: str, ip_address: str) -> bool:
+# Rate limits, shared by all workers on the host (see rate_limit.py)
+rate_limiter = RateLimiter()
+# 100 messages per hour per IP (for testing, change to 3/hour in production)
+message_rate_limit = rate_limiter.limit(
+    "messages", os.getenv("MESSAGE_RATE_LIMIT", "100/hour"), key_func=get_client_ip
+)
+# Also slows down brute-forcing of the admin secret
+admin_rate_limit = rate_limiter.limit(
+    "admin", os.getenv("ADMIN_RATE_LIMIT", "120/minute"), key_func=get_client_ip
+)
+
+
+def is_sender_blocked(email: str, ip_address: str) -> bool:
     """
-    Check if the sender is shadowbanned.
+    Check if the sender is shadowbanned, by email or by an IP/CIDR range.
     Returns True if blocked (should skip email but return success).
     """
-    blocked = db.query(BlockedSender).filter(
-        (BlockedSender.email == email) | (BlockedSender.ip_address == ip_address)
-    ).first()
-    return blocked is not None
+    return blocklist.is_blocked(email, ip_address)
 
 
 # ==================== PROJECTS ====================
 
-@app.get("/api/projects", response_model=List[ProjectResponse])
-def get_projects(db: Session = Depends(get_db)):
-    """Get all projects"""
-    projects = db.query(Project).all()
-    return projects
+MAX_PROJECT_PAGE_SIZE = 100
+
+
+@app.get("/api/projects", response_model=Union[List[ProjectResponse], ProjectPage])
+def get_projects(
+    request: Request,
+    tech: List[str] = Query([], description="Tech tag to filter by; repeat for several"),
+    match: str = Query("all", pattern="^(all|any)$", description="Require all or any of the tech tags"),
+    q: Optional[str] = Query(None, max_length=100, description="Text in the title or description"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PROJECT_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Get all projects (snapshot or cached, supports If-None-Match).
+
+    With tech, q, limit or offset, returns a filtered page instead:
+    {items, total, facets}, where facets counts tech tags across every
+    matching project.
+    """
+    if tech or q or limit is not None or offset:
+        page = filter_projects(
+            db, tech, match_all=match == "all", q=q,
+            limit=limit or MAX_PROJECT_PAGE_SIZE, offset=offset,
+        )
+        return ProjectPage.model_validate(page, from_attributes=True)
+
+    entry = catalog_snapshot.get("projects") if CATALOG_SNAPSHOT else None
+    if entry is not None:
+        return cached_response(request, entry, True)
+    entry, hit = response_cache.get_or_build(
+        "projects",
+        lambda: serialize_catalog(db, "projects"),
+    )
+    return cached_response(request, entry, hit)
 
 
 @app.post("/api/projects", response_model=ProjectResponse, status_code=201)
@@ -115,44 +296,135 @@ def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
         image_url=project.image_url,
     )
     db.add(db_project)
+    db.flush()
+    sync_project_tags(db, {db_project.id: db_project.tech_stack})
+    bump_catalog_version(db, Project.__tablename__)
     db.commit()
+    # The replica may not have the new row yet; read from the primary for a while
+    mark_primary_write()
     db.refresh(db_project)
+    response_cache.invalidate("projects", "bootstrap")
+    if CATALOG_SNAPSHOT:
+        catalog_snapshot.rebuild(db, "projects")
     return db_project
 
 
 # ==================== SKILLS ====================
 
 @app.get("/api/skills", response_model=List[SkillResponse])
-def get_skills(db: Session = Depends(get_db)):
-    """Get all skills"""
-    skills = db.query(Skill).all()
-    return skills
+def get_skills(request: Request, db: Session = Depends(get_read_db)):
+    """Get all skills (snapshot or cached, supports If-None-Match)"""
+    entry = catalog_snapshot.get("skills") if CATALOG_SNAPSHOT else None
+    if entry is not None:
+        return cached_response(request, entry, True)
+    entry, hit = response_cache.get_or_build(
+        "skills",
+        lambda: serialize_catalog(db, "skills"),
+    )
+    return cached_response(request, entry, hit)
+
+
+# ==================== BOOTSTRAP ====================
+
+@app.get("/api/bootstrap", response_model=BootstrapResponse)
+def get_bootstrap(request: Request, db: Session = Depends(get_read_db)):
+    """
+    Projects and category-grouped skills in one payload, so the home page
+    needs a single request (snapshot or cached, supports If-None-Match).
+    """
+    entry = catalog_snapshot.get("bootstrap") if CATALOG_SNAPSHOT else None
+    if entry is not None:
+        return cached_response(request, entry, True)
+    entry, hit = response_cache.get_or_build("bootstrap", lambda: serialize_bootstrap(db))
+    return cached_response(request, entry, hit)
+
+
+# ==================== IMAGES ====================
+
+@app.get("/api/images/{path:path}")
+async def get_image_variant(path: str, request: Request, w: int):
+    """
+    A local project image resized to width w (one of IMAGE_WIDTHS), as AVIF
+    or WebP per the Accept header. Encoded once, then served from disk.
+    """
+    if not IMAGES_ENABLED:
+        raise HTTPException(status_code=503, detail="Image variants need Pillow installed")
+    if w not in IMAGE_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"w must be one of {IMAGE_WIDTHS}")
+    source = resolve_source(path)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    fmt = negotiate_format(request.headers.get("accept", ""))
+    try:
+        variant = await image_pipeline.variant(source, w, fmt)
+    except unreadable_image_errors():
+        raise HTTPException(status_code=415, detail="Source is not a readable image")
+    # Variant files are named by content hash, width and format
+    headers = {
+        "ETag": f'"{variant.name}"',
+        "Cache-Control": f"public, max-age={IMAGE_MAX_AGE_SECONDS}",
+        "Vary": "Accept",
+    }
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(variant, media_type=f"image/{fmt}", headers=headers)
 
 
 # ==================== MESSAGES (Contact Form) ====================
 
-@app.post("/api/messages", response_model=MessageResponse, status_code=201)
-@limiter.limit("100/hour")  # Rate limit: 100 messages per hour per IP (for testing, change to 3/hour in production)
+async def store_message(db: AsyncSession, message: MessageCreate, ip_address: str, queue_email: bool):
+    """
+    Insert a message, plus its outbox row if queue_email, in one transaction.
+    Goes through the group-commit writer when it is running.
+    """
+    fields = {"name": message.name, "email": message.email, "message": message.message, "ip_address": ip_address}
+    if message_writer.running:
+        row = await message_writer.submit(fields, queue_email)
+        return MessageResponse(
+            id=row.id,
+            name=message.name,
+            email=message.email,
+            message=message.message,
+            created_at=row.created_at,
+        )
+    db_message = Message(**fields)
+    db.add(db_message)
+    if queue_email:
+        await db.flush()
+        db.add(EmailOutbox(message_id=db_message.id))
+    await db.commit()
+    await db.refresh(db_message)
+    return db_message
+
+
+@app.post(
+    "/api/messages",
+    response_model=MessageResponse,
+    status_code=201,
+    dependencies=[Depends(message_rate_limit)],
+)
 async def create_message(
     request: Request,
     message: MessageCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a new contact message with spam protection.
     
     Features:
-    - Rate limiting (3/hour per IP)
+    - Rate limiting (MESSAGE_RATE_LIMIT per IP, shared across workers)
     - Honeypot field (bot_check)
     - Shadowbanning (blocked senders get fake success)
-    - Async email notification
+    - Near-duplicate detection (floods of the same text from rotating senders)
+    - Group commit under bursts (GROUP_COMMIT_ENABLED)
+    - Email notification via the outbox worker
     """
     ip_address = get_client_ip(request)
     
     # 1. Honeypot check - if bot_check has value, it's a bot
     if message.bot_check:
-        print(f"🤖 Bot detected (honeypot triggered) from IP: {ip_address}")
+        logger.info("Bot detected (honeypot triggered)", extra={"event": "spam.honeypot", "ip": ip_address})
+        spam_blocked.inc("honeypot")
         # Return fake success to confuse the bot
         return MessageResponse(
             id=0,
@@ -163,73 +435,68 @@ async def create_message(
         )
     
     # 2. Shadowban check - if blocked, skip email but return success
-    if is_sender_blocked(db, message.email, ip_address):
-        print(f"🚫 Shadowbanned sender: {message.email} / {ip_address}")
+    if is_sender_blocked(message.email, ip_address):
+        logger.info("Shadowbanned sender", extra={"event": "spam.shadowban", "email": message.email, "ip": ip_address})
+        spam_blocked.inc("shadowban")
         # Store message but don't send email
-        db_message = Message(
-            name=message.name,
-            email=message.email,
-            message=message.message,
-            ip_address=ip_address,
-        )
-        db.add(db_message)
-        db.commit()
-        db.refresh(db_message)
-        return db_message
+        return await store_message(db, message, ip_address, queue_email=False)
     
-    # 3. Legitimate message - save and send email
-    db_message = Message(
-        name=message.name,
-        email=message.email,
-        message=message.message,
-        ip_address=ip_address,
-    )
-    db.add(db_message)
-    db.commit()
-    db.refresh(db_message)
+    # 3. Near-duplicate check - same text already seen from several senders
+    duplicate = SPAM_DUPLICATE_ACTION != "off" and duplicate_index.check(message.message)
+    if duplicate:
+        logger.info("Near-duplicate message", extra={
+            "event": "spam.near_duplicate", "action": SPAM_DUPLICATE_ACTION, "email": message.email, "ip": ip_address,
+        })
+        spam_blocked.inc("near_duplicate")
+        if SPAM_DUPLICATE_ACTION == "coalesce":
+            # Already stored and notified once; drop this copy but look successful
+            return MessageResponse(
+                id=0,
+                name=message.name,
+                email=message.email,
+                message=message.message,
+                created_at=None,
+            )
     
-    # 4. Send email notification in background (non-blocking)
-    print(f"📧 Checking email config: is_email_configured={is_email_configured()}")
-    if is_email_configured():
-        async def send_email_with_logging():
-            try:
-                print(f"📤 Attempting to send email notification to owner...")
-                result = await send_contact_notification(
-                    name=message.name,
-                    email=message.email,
-                    message=message.message,
-                    ip_address=ip_address,
-                )
-                print(f"📧 Email send result: {result}")
-            except Exception as e:
-                print(f"❌ Email background task error: {e}")
-                import traceback
-                traceback.print_exc()
-        
-        background_tasks.add_task(send_email_with_logging)
-    else:
-        print("⚠️ Email not configured, skipping notification")
+    # 4. Save it and, unless it's a shadowbanned duplicate, queue the notification in one transaction
+    email_queued = is_email_configured() and not duplicate
+    db_message = await store_message(db, message, ip_address, queue_email=email_queued)
+    
+    # 5. The outbox worker sends the email outside the request
+    if email_queued:
+        outbox_worker.notify()
+    elif not duplicate:
+        logger.warning("Email not configured, skipping notification", extra={"event": "email.not_configured"})
     
     return db_message
 
 
 # ==================== ADMIN ROUTES ====================
 
-def verify_admin_secret(x_admin_secret: Optional[str] = Header(None)) -> bool:
-    """Verify admin secret header"""
+def verify_admin_secret(
+    x_admin_secret: Optional[str] = Header(None),
+    _: None = Depends(admin_rate_limit),
+) -> bool:
+    """Verify admin secret header (rate limited per IP before the check)"""
     if not x_admin_secret or x_admin_secret != ADMIN_SECRET:
         raise HTTPException(status_code=403, detail="Invalid admin secret")
     return True
 
 
+async def authorize_profiling(request: Request) -> None:
+    """verify_admin_secret for ProfilingMiddleware, which runs outside dependency injection"""
+    await admin_rate_limit(request)
+    verify_admin_secret(request.headers.get("X-Admin-Secret"), None)
+
+
 @app.post("/api/admin/block", response_model=BlockedSenderResponse, status_code=201)
-def block_sender(
+async def block_sender(
     block_request: BlockSenderRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: bool = Depends(verify_admin_secret),
 ):
     """
-    Block a sender by email and/or IP address.
+    Block a sender by email and/or IP address or CIDR range (e.g. 203.0.113.0/24).
     Requires X-Admin-Secret header.
     """
     if not block_request.email and not block_request.ip_address:
@@ -238,60 +505,375 @@ def block_sender(
             detail="Must provide at least email or ip_address"
         )
     
-    # Check if already blocked
-    existing = db.query(BlockedSender).filter(
-        (BlockedSender.email == block_request.email) |
-        (BlockedSender.ip_address == block_request.ip_address)
-    ).first()
+    network = parse_network(block_request.ip_address)
+    if block_request.ip_address and network is None:
+        raise HTTPException(status_code=400, detail="Invalid IP address or CIDR range")
     
-    if existing:
+    # Check if already blocked (same email, or IP inside an existing range)
+    if blocklist.contains(block_request.email, network):
         raise HTTPException(status_code=409, detail="Sender already blocked")
     
     blocked = BlockedSender(
         email=block_request.email,
-        ip_address=block_request.ip_address,
+        ip_address=format_network(network) if network else None,
         reason=block_request.reason,
     )
     db.add(blocked)
-    db.commit()
-    db.refresh(blocked)
+    await db.commit()
+    await db.refresh(blocked)
+    blocklist.add(blocked.id, blocked.email, blocked.ip_address)
     
-    print(f"🚫 Blocked sender: {block_request.email or block_request.ip_address}")
+    logger.info("Blocked sender", extra={
+        "event": "admin.block", "email": block_request.email, "ip": block_request.ip_address,
+    })
     return blocked
 
 
 @app.get("/api/admin/blocked", response_model=List[BlockedSenderResponse])
-def list_blocked_senders(
-    db: Session = Depends(get_db),
+async def list_blocked_senders(
+    db: AsyncSession = Depends(get_async_db),
     _: bool = Depends(verify_admin_secret),
 ):
     """List all blocked senders. Requires X-Admin-Secret header."""
-    return db.query(BlockedSender).all()
+    result = await db.scalars(select(BlockedSender))
+    return result.all()
 
 
 @app.delete("/api/admin/block/{block_id}", status_code=204)
-def unblock_sender(
+async def unblock_sender(
     block_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: bool = Depends(verify_admin_secret),
 ):
     """Remove a sender from the blocklist. Requires X-Admin-Secret header."""
-    blocked = db.query(BlockedSender).filter(BlockedSender.id == block_id).first()
+    blocked = await db.get(BlockedSender, block_id)
     if not blocked:
         raise HTTPException(status_code=404, detail="Blocked sender not found")
     
-    db.delete(blocked)
-    db.commit()
+    await db.delete(blocked)
+    await db.commit()
+    blocklist.remove(block_id)
     return None
 
 
-@app.get("/api/admin/messages", response_model=List[MessageResponse])
-def list_messages(
+# Largest page list_messages will return, whatever the client asks for
+MAX_MESSAGE_PAGE_SIZE = 200
+
+
+def encode_message_cursor(message: Message) -> str:
+    """Opaque cursor pointing just past the given message"""
+    raw = json.dumps([message.created_at.isoformat(), message.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_message_cursor(cursor: str) -> tuple:
+    try:
+        created_at, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def filter_messages(query, email: Optional[str], ip_address: Optional[str],
+                    since: Optional[datetime], until: Optional[datetime]):
+    """Exact email/IP and created_at range [since, until) filters"""
+    if email:
+        query = query.where(Message.email == email)
+    if ip_address:
+        query = query.where(Message.ip_address == ip_address)
+    if since:
+        query = query.where(Message.created_at >= since)
+    if until:
+        query = query.where(Message.created_at < until)
+    return query
+
+
+@app.get("/api/admin/messages", response_model=MessagePage)
+async def list_messages(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_MESSAGE_PAGE_SIZE),
+    email: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    _: bool = Depends(verify_admin_secret),
+):
+    """
+    List contact messages newest first, one page at a time.
+    Requires X-Admin-Secret header.
+
+    Pass the returned next_cursor back to fetch the following page.
+    Filters: exact email, exact IP, and a created_at range [since, until).
+    """
+    query = filter_messages(select(Message), email, ip_address, since, until)
+    if cursor:
+        query = query.where(tuple_(Message.created_at, Message.id) < decode_message_cursor(cursor))
+
+    # Fetch one extra row to learn whether another page exists
+    query = query.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1)
+    messages = (await db.scalars(query)).all()
+
+    next_cursor = None
+    if len(messages) > limit:
+        messages = messages[:limit]
+        next_cursor = encode_message_cursor(messages[-1])
+    return MessagePage(items=messages, next_cursor=next_cursor)
+
+
+@app.get("/api/admin/messages/search", response_model=MessageSearchPage)
+async def search_messages_route(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_MESSAGE_PAGE_SIZE),
+    order: str = Query("rank", pattern="^(rank|recent)$"),
+    db: AsyncSession = Depends(get_async_db),
+    _: bool = Depends(verify_admin_secret),
+):
+    """
+    Full-text search over name, email and message, with highlighted snippets.
+    Requires X-Admin-Secret header.
+
+    Every word must match; end a word with * for a prefix match.
+    order=rank (default) scores the newest SEARCH_RANK_WINDOW matches;
+    order=recent pages through all matches newest first.
+    """
+    try:
+        items, next_cursor = await search_messages(db, q, limit, cursor, order)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return MessageSearchPage(items=items, next_cursor=next_cursor)
+
+
+def export_response(table: str, query, fmt: str, gzip: bool) -> StreamingResponse:
+    """Stream query's rows as an NDJSON/CSV (optionally gzipped) attachment"""
+    names = [column.key for column in EXPORT_COLUMNS[table]]
+    body = stream_export(query, names, fmt)
+    media_type = EXPORT_FORMATS[fmt]
+    if gzip:
+        body, media_type = gzip_chunks(body), "application/gzip"
+    return StreamingResponse(body, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{export_filename(table, fmt, gzip)}"',
+    })
+
+
+@app.get("/api/admin/messages/export")
+async def export_messages(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    email: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    _: bool = Depends(verify_admin_secret),
+):
+    """
+    Download contact messages oldest first as NDJSON or CSV, streamed in
+    batches so any table size exports in constant memory.
+    Takes the same filters as /api/admin/messages. Requires X-Admin-Secret header.
+    """
+    query = filter_messages(select(*EXPORT_COLUMNS["messages"]), email, ip_address, since, until)
+    return export_response("messages", query.order_by(Message.id), fmt, gzip)
+
+
+@app.get("/api/admin/blocked/export")
+async def export_blocked_senders(
+    fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    _: bool = Depends(verify_admin_secret),
+):
+    """Download the blocklist as NDJSON or CSV, streamed. Requires X-Admin-Secret header."""
+    query = select(*EXPORT_COLUMNS["blocked"]).order_by(BlockedSender.id)
+    return export_response("blocked", query, fmt, gzip)
+
+
+@app.post("/api/admin/retention/run")
+async def run_retention_now(
+    compact: bool = False,
+    _: bool = Depends(verify_admin_secret),
+):
+    """
+    Archive and delete expired messages now instead of waiting for the
+    schedule; compact=true also VACUUMs (locks the database while it runs).
+    Requires X-Admin-Secret header.
+    """
+    return await asyncio.to_thread(run_retention_once, SessionLocal, engine, compact)
+
+
+@app.get("/api/admin/archive")
+async def get_archives(_: bool = Depends(verify_admin_secret)):
+    """Archived message days and their compressed sizes. Requires X-Admin-Secret header."""
+    return list_archives()
+
+
+@app.get("/api/admin/archive/{day}")
+async def get_archive(
+    day: date,
+    email: Optional[str] = None,
+    _: bool = Depends(verify_admin_secret),
+):
+    """
+    Stream one day of archived messages as NDJSON, optionally only one
+    sender's. Requires X-Admin-Secret header.
+    """
+    if not archive_path(day).exists():
+        raise HTTPException(status_code=404, detail="No archive for that day")
+    return StreamingResponse(read_archive(day, email), media_type="application/x-ndjson")
+
+
+@app.get("/api/admin/outbox", response_model=OutboxStatusResponse)
+async def get_outbox_status(
+    db: AsyncSession = Depends(get_async_db),
+    _: bool = Depends(verify_admin_secret),
+):
+    """Email outbox queue depth. Requires X-Admin-Secret header."""
+    return await outbox_status(db)
+
+
+@app.post("/api/admin/outbox/retry-dead")
+async def retry_dead_outbox(
+    db: AsyncSession = Depends(get_async_db),
+    _: bool = Depends(verify_admin_secret),
+):
+    """Requeue dead-lettered notifications. Requires X-Admin-Secret header."""
+    requeued = await requeue_dead(db)
+    outbox_worker.notify()
+    return {"requeued": requeued}
+
+
+@app.get("/api/admin/cache")
+async def cache_stats(_: bool = Depends(verify_admin_secret)):
+    """
+    Read-cache hit/miss counters, plus the size of the precompressed body
+    cache. Requires X-Admin-Secret header.
+    """
+    return {**response_cache.stats(), "compressed": compressed_cache.stats()}
+
+
+@app.post("/api/admin/catalog/refresh")
+async def refresh_catalog(_: bool = Depends(verify_admin_secret)):
+    """
+    Re-serialize the projects/skills snapshot now, e.g. right after running
+    seed.py. Requires X-Admin-Secret header.
+    """
+    await asyncio.to_thread(refresh_catalog_snapshot, True)
+    return catalog_snapshot.stats()
+
+
+@app.get("/api/admin/group-commit")
+async def group_commit_stats(_: bool = Depends(verify_admin_secret)):
+    """
+    Group-commit writer state for this worker: batches written, rows per
+    batch and rows waiting. Requires X-Admin-Secret header.
+    """
+    return message_writer.stats()
+
+
+@app.get("/api/admin/spam")
+async def spam_stats(_: bool = Depends(verify_admin_secret)):
+    """
+    Near-duplicate detector state for this worker: messages checked and
+    caught, window size and thresholds. Requires X-Admin-Secret header.
+    """
+    return duplicate_index.stats()
+
+
+@app.get("/api/admin/metrics", response_class=PlainTextResponse)
+async def metrics(_: bool = Depends(verify_admin_secret)):
+    """
+    Prometheus text exposition of this worker's metrics: route latency,
+    per-request DB stats, email sends, rate-limit and spam counters.
+    Requires X-Admin-Secret header.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/admin/profiles")
+async def list_profiles(_: bool = Depends(verify_admin_secret)):
+    """
+    Requests profiled with the X-Profile header on this worker, newest first
+    (see profiling.py). Requires X-Admin-Secret header.
+    """
+    return profile_store.list()
+
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, _: bool = Depends(verify_admin_secret)):
+    """
+    One capture: timings, the SQL statements the request ran, and the top
+    functions of a cProfile capture. Requires X-Admin-Secret header.
+    """
+    entry = profile_store.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return entry[0]
+
+
+@app.get("/api/admin/profiles/{profile_id}/flamegraph")
+async def get_profile_flamegraph(profile_id: str, _: bool = Depends(verify_admin_secret)):
+    """
+    The raw profile: folded stacks (sample mode) for flamegraph.pl or
+    speedscope, or a .prof file (cprofile mode) for snakeviz or flameprof.
+    Requires X-Admin-Secret header.
+    """
+    entry = profile_store.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    summary, data = entry
+    if summary["mode"] == "sample":
+        media_type, filename = "text/plain", f"profile-{profile_id}.folded"
+    else:
+        media_type, filename = "application/octet-stream", f"profile-{profile_id}.prof"
+    return Response(data, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+# Largest array accepted by one bulk request; split bigger catalogs client-side
+CATALOG_BULK_MAX_ITEMS = int(os.getenv("CATALOG_BULK_MAX_ITEMS", "10000"))
+
+
+def write_catalog_batch(db: Session, kind: str, items: list, upsert: bool) -> dict:
+    """Bulk-write one kind in a single transaction and refresh the read paths"""
+    if len(items) > CATALOG_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {CATALOG_BULK_MAX_ITEMS} items per request",
+        )
+    counts = bulk_write(db, kind, items, upsert=upsert)
+    db.commit()
+    mark_primary_write()
+    key = f"{kind}s"
+    response_cache.invalidate(key, "bootstrap")
+    if CATALOG_SNAPSHOT:
+        catalog_snapshot.rebuild(db, key)
+    return counts
+
+
+@app.post("/api/admin/projects/bulk", response_model=BulkWriteResponse)
+def bulk_upsert_projects(
+    projects: List[ProjectCreate],
+    upsert: bool = Query(True, description="Update projects whose title already exists"),
     db: Session = Depends(get_db),
     _: bool = Depends(verify_admin_secret),
 ):
-    """List all contact messages. Requires X-Admin-Secret header."""
-    return db.query(Message).order_by(Message.created_at.desc()).all()
+    """
+    Insert or update many projects in one transaction, keyed on title.
+    Re-sending the same payload is a no-op. Requires X-Admin-Secret header.
+    """
+    return write_catalog_batch(db, "project", projects, upsert)
+
+
+@app.post("/api/admin/skills/bulk", response_model=BulkWriteResponse)
+def bulk_upsert_skills(
+    skills: List[SkillCreate],
+    upsert: bool = Query(True, description="Update skills whose name already exists"),
+    db: Session = Depends(get_db),
+    _: bool = Depends(verify_admin_secret),
+):
+    """
+    Insert or update many skills in one transaction, keyed on name.
+    Re-sending the same payload is a no-op. Requires X-Admin-Secret header.
+    """
+    return write_catalog_batch(db, "skill", skills, upsert)
 
 
 # ==================== HEALTH CHECK ====================
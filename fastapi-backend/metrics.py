@@ -0,0 +1,261 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms are plain dicts behind a lock, so there is no
+extra dependency. Each uvicorn worker keeps its own numbers; scrape
+every worker, or run one, to get the full picture.
+
+- MetricsMiddleware: per-route latency, plus DB query count and time per request
+- instrument_engine(): SQLAlchemy cursor events that time every statement
+  and charge it to the request being served
+"""
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+                for labels, value in sorted(self._values.items())
+            ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((labels, list(state)) for labels, state in self._values.items())
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else format_value(bound)
+                bucket_labels = format_labels(self.labelnames, labels, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(round(state[-1], 6))}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ("method", "route", "status"),
+)
+db_queries_per_request = registry.histogram(
+    "db_queries_per_request", "SQL statements executed while serving one request",
+    ("route",), buckets=QUERY_COUNT_BUCKETS,
+)
+db_time_per_request = registry.histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements while serving one request",
+    ("route",),
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Latency of single SQL statements by verb", ("operation",),
+)
+email_send_duration = registry.histogram(
+    "email_send_duration_seconds", "Email provider call latency", ("provider", "outcome"),
+)
+email_send_failures = registry.counter(
+    "email_send_failures_total", "Email sends that raised an error", ("provider",),
+)
+rate_limit_rejections = registry.counter(
+    "rate_limit_rejections_total", "Requests rejected with 429", ("scope",),
+)
+spam_blocked = registry.counter(
+    "spam_blocked_total", "Contact messages caught by spam protection", ("reason",),
+)
+compression_duration = registry.histogram(
+    "compression_duration_seconds", "CPU time compressing response bodies (cache misses and stream chunks)",
+    ("route", "encoding"), buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5),
+)
+compression_bytes = registry.counter(
+    "compression_bytes_total", "Response bytes before (in) and after (out) compression",
+    ("route", "encoding", "direction"),
+)
+compression_cache = registry.counter(
+    "compression_cache_total", "Lookups of precompressed bodies by strong ETag", ("result",),
+)
+group_commit_batch_size = registry.histogram(
+    "group_commit_batch_size", "Contact messages written per group-commit transaction",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+group_commit_duration = registry.histogram(
+    "group_commit_duration_seconds", "Time to write and commit one group-commit batch",
+)
+log_records_dropped = registry.counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full",
+)
+
+
+class QueryStats:
+    """SQL statement count and time for the request being served"""
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # (statement, seconds) pairs, kept only while the request is being profiled
+        self.statements: Optional[List[Tuple[str, float]]] = None
+
+
+# Set per request by the middleware. Threadpool and asyncio.to_thread calls
+# copy the context, so they share the same QueryStats object.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on a sync Engine (use .sync_engine for async ones)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        db_query_duration.observe(elapsed, operation)
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+            if stats.statements is not None:
+                stats.statements.append((statement, elapsed))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # after_cursor_execute never fires for a failed statement
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: records latency and DB stats for each HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_query_stats.reset(token)
+            # Route templates keep label cardinality bounded; unknown paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration.observe(elapsed, scope["method"], route, str(status))
+            db_queries_per_request.observe(stats.count, route)
+            db_time_per_request.observe(stats.seconds, route)
@@ -1,7 +1,23 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Index, ForeignKey
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from database import Base
 
+# SQLite's CURRENT_TIMESTAMP has second precision. Bind datetimes in the same
+# text format so range comparisons on the column line up with stored values.
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
+
+
+def utcnow() -> datetime:
+    """Naive UTC timestamp, matching what CURRENT_TIMESTAMP stores"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 class Project(Base):
     __tablename__ = "projects"
@@ -15,6 +31,23 @@ class Project(Base):
     image_url = Column(String, nullable=False)
 
 
+class ProjectTag(Base):
+    """
+    Inverted index from technology to project, derived from Project.tech_stack.
+    Written by catalog.sync_project_tags whenever a project is written.
+    """
+    __tablename__ = "project_tags"
+    __table_args__ = (
+        # Tag filters and facet counts look projects up by tag
+        Index("ix_project_tags_tag_key_project_id", "tag_key", "project_id"),
+    )
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    # Lowercased tag, so "FastAPI" and "fastapi" are one tag
+    tag_key = Column(String, primary_key=True)
+    tag = Column(String, nullable=False)  # as written in tech_stack
+
+
 class Skill(Base):
     __tablename__ = "skills"
 
@@ -23,15 +56,34 @@ class Skill(Base):
     category = Column(String, nullable=False)  # 'Languages', 'Frameworks', 'Tools'
 
 
+class CatalogVersion(Base):
+    """
+    Write counter per catalog table, bumped by catalog writes in their own
+    transaction. Upserts edit rows in place without changing the row count
+    or max id, so the snapshot's change check reads this as well.
+    """
+    __tablename__ = "catalog_versions"
+
+    name = Column(String, primary_key=True)  # table name
+    version = Column(Integer, nullable=False, default=0)
+
+
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset pagination walks (created_at, id) newest first; the email and
+        # IP variants keep filtered pages on an index range scan too
+        Index("ix_messages_created_at_id", "created_at", "id"),
+        Index("ix_messages_email_created_at_id", "email", "created_at", "id"),
+        Index("ix_messages_ip_created_at_id", "ip_address", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     email = Column(String, nullable=False)
     message = Column(String, nullable=False)
     ip_address = Column(String, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
 
 
 class BlockedSender(Base):
@@ -43,3 +95,26 @@ class BlockedSender(Base):
     ip_address = Column(String, nullable=True, index=True)
     reason = Column(String, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
+
+
+class EmailOutbox(Base):
+    """
+    Contact notifications waiting to be emailed. Rows are written in the same
+    transaction as their Message and drained by outbox.OutboxWorker.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # The worker polls for due rows by status and next_attempt_at
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Indexed for retention, which checks and deletes outbox rows by message
+    message_id = Column(Integer, ForeignKey("messages.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending")  # 'pending', 'sending', 'sent', 'dead'
+    attempts = Column(Integer, nullable=False, default=0)
+    # When a pending row is due, or when a sending row's lease expires
+    next_attempt_at = Column(Timestamp, nullable=False, default=utcnow)
+    last_error = Column(String, nullable=True)
+    created_at = Column(Timestamp, nullable=False, default=utcnow)
+    sent_at = Column(Timestamp, nullable=True)
@@ -0,0 +1,275 @@
+"""
+Transactional outbox for contact notification emails.
+
+create_message writes an EmailOutbox row in the same transaction as the
+Message, so a notification is never lost to a crash or restart. The
+OutboxWorker drains due rows with bounded concurrency, retries failures
+with exponential backoff, and parks rows in a 'dead' state once they run
+out of attempts. Email-provider latency never reaches the web request.
+
+With EMAIL_DIGEST_ENABLED=true the worker coalesces bursts: due rows are
+held until the oldest has waited EMAIL_DIGEST_WINDOW_SECONDS or
+EMAIL_DIGEST_MAX_MESSAGES are queued, then go out as one summary email.
+
+The worker runs inside the API process by default (EMAIL_WORKER_MODE=embedded).
+To run it as a separate process instead, set EMAIL_WORKER_MODE=external on
+the API and start:  python outbox.py
+"""
+import asyncio
+import logging
+import os
+import random
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import and_, func, select, update
+
+from database import AsyncSessionLocal
+from models import EmailOutbox, Message, utcnow
+from email_service import send_contact_notification, send_contact_digest
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_DEAD = "dead"
+
+EMAIL_WORKER_MODE = os.getenv("EMAIL_WORKER_MODE", "embedded")  # 'embedded' or 'external'
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "4"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+# A 'sending' row whose lease expires (worker died mid-send) is retried
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
+EMAIL_DIGEST_ENABLED = os.getenv("EMAIL_DIGEST_ENABLED", "false").lower() == "true"
+EMAIL_DIGEST_WINDOW_SECONDS = float(os.getenv("EMAIL_DIGEST_WINDOW_SECONDS", "60"))
+EMAIL_DIGEST_MAX_MESSAGES = int(os.getenv("EMAIL_DIGEST_MAX_MESSAGES", "25"))
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+    delay = min(OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _due(now):
+    """Pending rows whose retry time has come, and sending rows whose lease expired"""
+    return and_(
+        EmailOutbox.status.in_([STATUS_PENDING, STATUS_SENDING]),
+        EmailOutbox.next_attempt_at <= now,
+    )
+
+
+class OutboxJob:
+    """A claimed outbox row joined with the message it notifies about"""
+
+    __slots__ = ("id", "attempts", "name", "email", "message", "ip_address")
+
+    def __init__(self, row):
+        self.id = row.id
+        self.attempts = row.attempts
+        self.name = row.name
+        self.email = row.email
+        self.message = row.message
+        self.ip_address = row.ip_address or "unknown"
+
+    def as_email_fields(self) -> dict:
+        return {
+            "name": self.name,
+            "email": self.email,
+            "message": self.message,
+            "ip_address": self.ip_address,
+        }
+
+
+class OutboxWorker:
+    """Polls email_outbox and delivers due notifications"""
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        send: Callable[..., Awaitable[bool]] = send_contact_notification,
+        send_digest: Callable[[List[dict]], Awaitable[bool]] = send_contact_digest,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        concurrency: int = OUTBOX_CONCURRENCY,
+        digest_enabled: bool = EMAIL_DIGEST_ENABLED,
+        digest_window: float = EMAIL_DIGEST_WINDOW_SECONDS,
+        digest_max: int = EMAIL_DIGEST_MAX_MESSAGES,
+    ):
+        self.session_factory = session_factory
+        self.send = send
+        self.send_digest = send_digest
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.digest_enabled = digest_enabled
+        self.digest_window = digest_window
+        self.digest_max = digest_max
+        self._wake = asyncio.Event()
+        self._stopping = False
+
+    def notify(self) -> None:
+        """Wake the worker early, e.g. right after a new row is committed"""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    async def run(self) -> None:
+        """Drain until stopped, sleeping between empty polls"""
+        while not self._stopping:
+            try:
+                processed = await self.drain_once()
+            except Exception:
+                logger.exception("Outbox worker error", extra={"event": "outbox.error"})
+                processed = 0
+            if processed:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def drain_once(self) -> int:
+        """Claim one batch of due rows and deliver it; returns the batch size"""
+        if self.digest_enabled:
+            return await self._drain_digest()
+        jobs = await self._claim(self.batch_size)
+        if not jobs:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(job: OutboxJob) -> None:
+            async with semaphore:
+                await self._deliver(job)
+
+        await asyncio.gather(*(deliver(job) for job in jobs))
+        return len(jobs)
+
+    async def _drain_digest(self) -> int:
+        """Send one digest once the window has elapsed or enough rows are due"""
+        now = utcnow()
+        async with self.session_factory() as db:
+            due_count, oldest = (await db.execute(
+                select(func.count(), func.min(EmailOutbox.created_at)).where(_due(now))
+            )).one()
+        if not due_count:
+            return 0
+        window_elapsed = (now - oldest).total_seconds() >= self.digest_window
+        if due_count < self.digest_max and not window_elapsed:
+            return 0
+
+        jobs = await self._claim(self.digest_max)
+        if not jobs:
+            return 0
+        error: Optional[str] = None
+        try:
+            if not await self.send_digest([job.as_email_fields() for job in jobs]):
+                error = "Email provider did not accept the digest"
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        await self._settle(jobs, error)
+        return len(jobs)
+
+    async def _claim(self, limit: int) -> List[OutboxJob]:
+        now = utcnow()
+        due = _due(now)
+        async with self.session_factory() as db:
+            candidates = select(EmailOutbox.id).where(due).order_by(EmailOutbox.next_attempt_at).limit(limit)
+            # Re-checking `due` in the UPDATE means two workers never claim the same row
+            claimed = await db.scalars(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(candidates.scalar_subquery()), due)
+                .values(
+                    status=STATUS_SENDING,
+                    attempts=EmailOutbox.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+                )
+                .returning(EmailOutbox.id)
+            )
+            ids = list(claimed)
+            await db.commit()
+            if not ids:
+                return []
+            rows = await db.execute(
+                select(
+                    EmailOutbox.id, EmailOutbox.attempts,
+                    Message.name, Message.email, Message.message, Message.ip_address,
+                )
+                .join(Message, Message.id == EmailOutbox.message_id)
+                .where(EmailOutbox.id.in_(ids))
+                .order_by(EmailOutbox.created_at, EmailOutbox.id)
+            )
+            return [OutboxJob(row) for row in rows]
+
+    async def _deliver(self, job: OutboxJob) -> None:
+        error: Optional[str] = None
+        try:
+            sent = await self.send(**job.as_email_fields())
+            if not sent:
+                error = "Email provider did not accept the notification"
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+        await self._settle([job], error)
+
+    async def _settle(self, jobs: List[OutboxJob], error: Optional[str]) -> None:
+        """Mark jobs sent, or schedule a retry / dead-letter them on error"""
+        now = utcnow()
+        async with self.session_factory() as db:
+            for job in jobs:
+                if error is None:
+                    values = {"status": STATUS_SENT, "sent_at": now, "last_error": None}
+                elif job.attempts >= OUTBOX_MAX_ATTEMPTS:
+                    values = {"status": STATUS_DEAD, "last_error": error}
+                    logger.error("Outbox row dead after %d attempts: %s", job.attempts, error,
+                                 extra={"event": "outbox.dead", "outbox_id": job.id})
+                else:
+                    retry_at = now + timedelta(seconds=backoff_delay(job.attempts))
+                    values = {"status": STATUS_PENDING, "next_attempt_at": retry_at, "last_error": error}
+                    logger.warning("Outbox row failed (attempt %d), retrying: %s", job.attempts, error,
+                                   extra={"event": "outbox.retry", "outbox_id": job.id})
+                await db.execute(update(EmailOutbox).where(EmailOutbox.id == job.id).values(**values))
+            await db.commit()
+
+
+async def outbox_status(db) -> dict:
+    """Queue depth per status plus the age of the oldest undelivered row"""
+    counts = dict((await db.execute(
+        select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)
+    )).all())
+    oldest = await db.scalar(
+        select(func.min(EmailOutbox.created_at)).where(
+            EmailOutbox.status.in_([STATUS_PENDING, STATUS_SENDING])
+        )
+    )
+    return {
+        "pending": counts.get(STATUS_PENDING, 0),
+        "sending": counts.get(STATUS_SENDING, 0),
+        "sent": counts.get(STATUS_SENT, 0),
+        "dead": counts.get(STATUS_DEAD, 0),
+        "oldest_pending_seconds": (utcnow() - oldest).total_seconds() if oldest else None,
+    }
+
+
+async def requeue_dead(db) -> int:
+    """Give dead-lettered rows a fresh set of attempts"""
+    result = await db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == STATUS_DEAD)
+        .values(status=STATUS_PENDING, attempts=0, next_attempt_at=utcnow())
+    )
+    await db.commit()
+    return result.rowcount
+
+
+outbox_worker = OutboxWorker()
+
+
+if __name__ == "__main__":
+    logger.info("Outbox worker started", extra={"event": "outbox.started"})
+    asyncio.run(outbox_worker.run())
@@ -0,0 +1,292 @@
+"""
+Opt-in profiling of single requests, for admins diagnosing a slow route.
+
+Send the request with X-Profile: sample (or cprofile) plus the usual
+X-Admin-Secret header. The response comes back unchanged except for an
+X-Profile-Id header. The capture is then available from:
+
+- GET /api/admin/profiles/{id}: timings plus every SQL statement the
+  request ran, grouped with counts and durations
+- GET /api/admin/profiles/{id}/flamegraph: the profile itself
+
+The two modes produce different profiles:
+- sample: a thread walks every thread's stack each
+  PROFILE_SAMPLE_INTERVAL_MS and counts them as folded stacks
+  ("thread;outer;...;inner count"), the input format of flamegraph.pl,
+  speedscope and inferno
+- cprofile: deterministic cProfile stats, downloaded as a .prof file for
+  snakeviz, flameprof or python -m pstats
+
+Both modes see the whole worker process, so requests served concurrently
+by the same worker show up too; profile on a quiet worker where you can.
+Only one request per worker is profiled at a time, and others asking get
+409. Requests without X-Profile only pay for one header lookup.
+The last PROFILE_STORE_SIZE captures are kept in memory, per worker.
+"""
+import cProfile
+import json
+import linecache
+import logging
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from metrics import current_query_stats
+from models import utcnow
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").lower() == "true"
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "20"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+# Functions listed in a cProfile capture's summary
+PROFILE_TOP_FUNCTIONS = 25
+
+PROFILE_MODES = ("sample", "cprofile")
+# Samples of threads parked waiting for work are dropped: the innermost
+# frame is one of these functions, or its current line blocks in a C-level
+# queue get (thread pool workers, aiosqlite's connection thread)
+IDLE_FRAMES = {("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("queue.py", "get")}
+IDLE_CALLS = ("queue.get(", "tx.get(")
+_idle_lines: Dict[Tuple[object, int], bool] = {}
+
+
+def is_idle(frame) -> bool:
+    code = frame.f_code
+    key = (code, frame.f_lineno)
+    idle = _idle_lines.get(key)
+    if idle is None:
+        line = linecache.getline(code.co_filename, frame.f_lineno)
+        idle = (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES or any(
+            call in line for call in IDLE_CALLS
+        )
+        _idle_lines[key] = idle
+    return idle
+
+
+def frame_label(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Counts the folded stacks of every other thread at a fixed interval"""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        # A busy thread keeps the GIL for the switch interval (5 ms by default),
+        # which would starve the sampler; shorten it while sampling
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 2))
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                if is_idle(frame):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def folded(self) -> bytes:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common()).encode()
+
+
+def top_functions(profile: cProfile.Profile, limit: int = PROFILE_TOP_FUNCTIONS) -> List[dict]:
+    stats = pstats.Stats(profile)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "own_ms": round(own * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3),
+        }
+        for (filename, line, name), (_, calls, own, cumulative, _) in rows
+    ]
+
+
+def summarize_sql(statements: List[Tuple[str, float]]) -> dict:
+    """Statements grouped by text (parameters are never recorded), slowest first"""
+    grouped = defaultdict(lambda: [0, 0.0, 0.0])
+    for statement, seconds in statements:
+        entry = grouped[" ".join(statement.split())]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+    return {
+        "count": len(statements),
+        "total_ms": round(sum(seconds for _, seconds in statements) * 1000, 3),
+        "statements": [
+            {"sql": sql, "count": count, "total_ms": round(total * 1000, 3), "max_ms": round(slowest * 1000, 3)}
+            for sql, (count, total, slowest) in sorted(grouped.items(), key=lambda item: item[1][1], reverse=True)
+        ],
+    }
+
+
+class ProfileStore:
+    """The last max_size captures: a JSON summary plus the raw profile each"""
+
+    def __init__(self, max_size: int = PROFILE_STORE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[dict, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, summary: dict, data: bytes) -> None:
+        with self._lock:
+            self._entries[summary["id"]] = (summary, data)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Tuple[dict, bytes]]:
+        with self._lock:
+            return self._entries.get(profile_id)
+
+    def list(self) -> List[dict]:
+        """Newest first, without the per-statement SQL breakdown"""
+        with self._lock:
+            summaries = [summary for summary, _ in reversed(self._entries.values())]
+        return [
+            {**summary, "sql": {key: value for key, value in summary["sql"].items() if key != "statements"}}
+            for summary in summaries
+        ]
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware: profiles requests that carry X-Profile.
+    authorize(request) raises HTTPException when the caller may not profile.
+    Must sit inside MetricsMiddleware, which sets up the per-request SQL stats.
+    """
+
+    def __init__(self, app, authorize: Callable[[Request], Awaitable[None]], store: ProfileStore = profile_store):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = next((value for key, value in scope["headers"] if key == b"x-profile"), None)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        mode = mode.decode("latin-1").strip().lower()
+        try:
+            await self.authorize(Request(scope))
+            if mode not in PROFILE_MODES:
+                raise HTTPException(status_code=400, detail=f"X-Profile must be one of: {', '.join(PROFILE_MODES)}")
+            if not self._busy.acquire(blocking=False):
+                raise HTTPException(status_code=409, detail="Another request is being profiled")
+        except HTTPException as exc:
+            await self._send_error(send, exc)
+            return
+        try:
+            await self._profile(scope, receive, send, mode)
+        finally:
+            self._busy.release()
+
+    async def _profile(self, scope, receive, send, mode: str) -> None:
+        profile_id = uuid.uuid4().hex[:12]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": list(message["headers"]) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        sampler = profiler = None
+        if mode == "sample":
+            sampler = StackSampler()
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # another profiler (a debugger, coverage) owns the process
+                await self._send_error(send, HTTPException(status_code=409, detail="Another profiler is active"))
+                return
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.statements = []
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            if sampler is not None:
+                sampler.stop()
+            else:
+                profiler.disable()
+            statements = stats.statements if stats is not None else []
+            if stats is not None:
+                stats.statements = None
+
+            summary = {
+                "id": profile_id,
+                "created_at": utcnow().isoformat(),
+                "mode": mode,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", "unmatched"),
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 3),
+                "sql": summarize_sql(statements),
+            }
+            if sampler is not None:
+                summary["samples"] = sampler.samples
+                summary["interval_ms"] = sampler.interval * 1000
+                data = sampler.folded()
+            else:
+                summary["functions"] = top_functions(profiler)
+                profiler.create_stats()
+                data = marshal.dumps(profiler.stats)
+            self.store.add(summary, data)
+            logger.info("Request profiled", extra={
+                "event": "profile.captured", "profile_id": profile_id, "mode": mode,
+                "route": summary["route"], "duration_ms": summary["duration_ms"],
+            })
+
+    @staticmethod
+    async def _send_error(send, exc: HTTPException) -> None:
+        body = json.dumps({"detail": exc.detail}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        headers += [(key.lower().encode(), value.encode()) for key, value in (exc.headers or {}).items()]
+        await send({"type": "http.response.start", "status": exc.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
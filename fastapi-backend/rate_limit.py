@@ -0,0 +1,225 @@
+"""
+Sliding-window rate limiting shared across uvicorn workers.
+
+Each key keeps two fixed-window counters; the estimate for the sliding
+window is current + previous * (unelapsed share of the previous window),
+so state is O(1) per key. Two backends:
+
+- sqlite (default): a small WAL-mode SQLite file, shared by every worker
+  on the host. Idle keys are purged and the key count is capped
+  (least recently seen first), so IP-rotation floods can't grow it.
+- memory: per-process LRU dict, for single-worker dev or tests.
+
+Limits plug into routes as FastAPI dependencies:
+
+    message_rate_limit = rate_limiter.limit("messages", "100/hour", key_func=get_client_ip)
+
+    @app.post("/api/messages", dependencies=[Depends(message_rate_limit)])
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+from fastapi import HTTPException, Request
+
+from metrics import rate_limit_rejections
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "sqlite")  # 'sqlite' or 'memory'
+RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "./ratelimit.db")
+# Upper bound on tracked keys; beyond it the least recently seen are evicted
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse '100/hour' or '5/10 minutes' into (limit, window_seconds)"""
+    count, _, period = rate.partition("/")
+    parts = period.strip().split()
+    multiplier = int(parts[0]) if len(parts) == 2 else 1
+    unit = parts[-1].rstrip("s").lower()
+    if unit not in PERIODS:
+        raise ValueError(f"Unknown rate limit period: {rate}")
+    return int(count), multiplier * PERIODS[unit]
+
+
+def sliding_count(window_start: float, current: int, previous: int, window: int, now: float) -> float:
+    """Weighted request count over the sliding window ending at now"""
+    elapsed = (now - window_start) / window
+    return current + previous * max(0.0, 1.0 - elapsed)
+
+
+def window_floor(now: float, window: int) -> int:
+    return math.floor(now / window) * window
+
+
+def roll_window(window_start: int, current: int, previous: int, window: int, now: float) -> Tuple[int, int, int]:
+    """Advance a key's fixed windows to the one containing now"""
+    aligned = window_floor(now, window)
+    if aligned == window_start:
+        return window_start, current, previous
+    # Exactly one window ago: the current count becomes the previous one
+    previous = current if aligned - window_start == window else 0
+    return aligned, 0, previous
+
+
+class MemoryBackend:
+    """Per-process counters in an LRU-ordered dict"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._state: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window: int, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            window_start, current, previous = self._state.pop(key, (window_floor(now, window), 0, 0))
+            window_start, current, previous = roll_window(window_start, current, previous, window, now)
+            allowed = sliding_count(window_start, current, previous, window, now) < limit
+            if allowed:
+                current += 1
+            self._state[key] = (window_start, current, previous)
+            while len(self._state) > self.max_keys:
+                self._state.popitem(last=False)
+        return allowed, 0.0 if allowed else window_start + window - now
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state.clear()
+
+
+class SQLiteBackend:
+    """Counters in a WAL-mode SQLite file shared by all workers on the host"""
+
+    blocking = True
+    # Purge idle keys roughly once every this many hits
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path: str = RATE_LIMIT_DB_PATH, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.path = path
+        self.max_keys = max_keys
+        self._local = threading.local()
+        self._hits = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread, opened (and the table created) on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    key TEXT PRIMARY KEY,
+                    window_start INTEGER NOT NULL,
+                    current INTEGER NOT NULL,
+                    previous INTEGER NOT NULL,
+                    window INTEGER NOT NULL,
+                    last_seen REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_last_seen ON rate_limits (last_seen)")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, key: str, limit: int, window: int, now: float) -> Tuple[bool, float]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT window_start, current, previous FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+            window_start, current, previous = row or (window_floor(now, window), 0, 0)
+            window_start, current, previous = roll_window(int(window_start), current, previous, window, now)
+            allowed = sliding_count(window_start, current, previous, window, now) < limit
+            if allowed:
+                current += 1
+            conn.execute(
+                """
+                INSERT INTO rate_limits (key, window_start, current, previous, window, last_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    window_start = excluded.window_start, current = excluded.current,
+                    previous = excluded.previous, window = excluded.window,
+                    last_seen = excluded.last_seen
+                """,
+                (key, window_start, current, previous, window, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._hits += 1
+        if self._hits % self.SWEEP_EVERY == 0:
+            self.sweep(now)
+        return allowed, 0.0 if allowed else window_start + window - now
+
+    def sweep(self, now: float) -> None:
+        """Drop keys idle for two windows, then cap the table at max_keys"""
+        conn = self._connect()
+        conn.execute("DELETE FROM rate_limits WHERE last_seen < ? - 2 * window", (now,))
+        conn.execute(
+            """
+            DELETE FROM rate_limits WHERE key IN (
+                SELECT key FROM rate_limits ORDER BY last_seen DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_keys,),
+        )
+
+    def reset(self) -> None:
+        self._connect().execute("DELETE FROM rate_limits")
+
+
+class RateLimit:
+    """FastAPI dependency enforcing one rate on one scope"""
+
+    def __init__(self, limiter: "RateLimiter", scope: str, rate: str, key_func: Callable[[Request], str]):
+        self.limiter = limiter
+        self.scope = scope
+        self.rate = rate
+        self.limit, self.window = parse_rate(rate)
+        self.key_func = key_func
+
+    async def __call__(self, request: Request) -> None:
+        if not self.limiter.enabled:
+            return
+        key = f"{self.scope}:{self.key_func(request)}"
+        backend = self.limiter.backend
+        now = time.time()
+        if backend.blocking:
+            allowed, retry_after = await asyncio.to_thread(backend.hit, key, self.limit, self.window, now)
+        else:
+            allowed, retry_after = backend.hit(key, self.limit, self.window, now)
+        if not allowed:
+            rate_limit_rejections.inc(self.scope)
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded: {self.rate}",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+
+class RateLimiter:
+    """Holds the shared backend; hands out per-route RateLimit dependencies"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or build_backend()
+        self.enabled = True
+
+    def limit(self, scope: str, rate: str, key_func: Callable[[Request], str]) -> RateLimit:
+        return RateLimit(self, scope, rate, key_func)
+
+
+def build_backend():
+    if RATE_LIMIT_BACKEND == "memory":
+        return MemoryBackend()
+    return SQLiteBackend()
@@ -0,0 +1,286 @@
+"""
+Retention for the messages table: expired rows move to compressed archive
+files and are deleted from the hot table.
+
+Policies (0 disables one):
+- RETENTION_BLOCKED_DAYS: messages whose email or IP is on the blocklist
+- RETENTION_DAYS: every message
+
+Expired rows are appended to ARCHIVE_DIR/messages/YYYY-MM-DD.jsonl.gz,
+one file per created_at day, then deleted together with their outbox rows.
+Each batch is its own short transaction, so writers are never locked out
+for long. Rows whose notification is still pending or sending are left for
+a later run. A crash between the append and the delete can archive a row
+twice; readers should treat id as the key.
+
+RETENTION_DAYS expires everything older than its cutoff, so that pass is
+a plain range scan on (created_at, id). The blocked policy has to look at
+each row, so it resumes from a watermark kept in
+ARCHIVE_DIR/.retention-state.json: rows at or below it have been checked
+against the blocklist already. The watermark starts over when the
+blocklist changes, and never passes a row skipped for a pending
+notification.
+
+Runs periodically inside the API (RETENTION_INTERVAL_SECONDS) or on demand:
+
+    python retention.py            # one run
+    python retention.py --compact  # then reclaim space (VACUUM)
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from blocklist import BlocklistIndex
+from models import BlockedSender, EmailOutbox, Message, utcnow
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-worker lock, run retention from one process
+    fcntl = None
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "0"))
+RETENTION_BLOCKED_DAYS = int(os.getenv("RETENTION_BLOCKED_DAYS", "30"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+# Pause between batches so other writers get the database in between
+RETENTION_BATCH_PAUSE_SECONDS = float(os.getenv("RETENTION_BATCH_PAUSE_SECONDS", "0.05"))
+# Seconds between runs inside the API; 0 leaves it to the CLI or admin endpoint
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "86400"))
+# First run inside the API comes this long after startup, plus up to as much
+# again in jitter, so hosts that restart daily still run it
+RETENTION_STARTUP_DELAY_SECONDS = float(os.getenv("RETENTION_STARTUP_DELAY_SECONDS", "60"))
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", "archive"))
+STATE_FILE = ".retention-state.json"
+
+MESSAGE_COLUMNS = [Message.id, Message.name, Message.email, Message.message, Message.ip_address, Message.created_at]
+
+
+def retention_enabled() -> bool:
+    return RETENTION_DAYS > 0 or RETENTION_BLOCKED_DAYS > 0
+
+
+def archive_path(day: date) -> Path:
+    return ARCHIVE_DIR / "messages" / f"{day.isoformat()}.jsonl.gz"
+
+
+def append_archive(rows: List[dict]) -> None:
+    """Append rows to their day's archive file and fsync before returning"""
+    by_day: Dict[date, List[dict]] = defaultdict(list)
+    for row in rows:
+        by_day[row["created_at"].date()].append(row)
+    for day, day_rows in by_day.items():
+        path = archive_path(day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(
+            json.dumps({**row, "created_at": row["created_at"].isoformat()}, ensure_ascii=False) + "\n"
+            for row in day_rows
+        )
+        # Each append adds a gzip member; readers see one continuous stream
+        with open(path, "ab") as archive:
+            archive.write(gzip.compress(lines.encode()))
+            archive.flush()
+            os.fsync(archive.fileno())
+
+
+@contextmanager
+def retention_lock() -> Iterator[bool]:
+    """Non-blocking host-wide lock, so only one worker runs retention at a time"""
+    if fcntl is None:
+        yield True
+        return
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(ARCHIVE_DIR / ".retention.lock", "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def load_blocked(db: Session) -> Tuple[Callable[[Optional[str], Optional[str]], bool], list]:
+    """The blocklist lookup, plus a [count, max id] fingerprint of the table"""
+    index = BlocklistIndex()
+    index.load(db.execute(select(BlockedSender.id, BlockedSender.email, BlockedSender.ip_address)).all())
+    fingerprint = list(db.execute(select(func.count(), func.max(BlockedSender.id))).one())
+    return index.is_blocked, fingerprint
+
+
+def load_state() -> dict:
+    try:
+        return json.loads((ARCHIVE_DIR / STATE_FILE).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(state: dict) -> None:
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    path = ARCHIVE_DIR / STATE_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+def sweep(db: Session, condition, after: Optional[tuple], is_expired: Callable[[dict], bool], counts: dict):
+    """
+    Walk messages matching condition in (created_at, id) order, starting
+    after the given position, and archive the expired ones in batches.
+    Returns the position up to which every row has been settled: the last
+    row scanned, or the row before the first one left for its pending
+    notification.
+    """
+    settled = after
+    frozen = False
+    while True:
+        query = select(*MESSAGE_COLUMNS).where(condition)
+        if after is not None:
+            query = query.where(tuple_(Message.created_at, Message.id) > after)
+        rows = [
+            dict(row._mapping) for row in
+            db.execute(query.order_by(Message.created_at, Message.id).limit(RETENTION_BATCH_SIZE))
+        ]
+        if not rows:
+            break
+        after = (rows[-1]["created_at"], rows[-1]["id"])
+        counts["scanned"] += len(rows)
+
+        expired = [row for row in rows if is_expired(row)]
+        pending = set()
+        if expired:
+            pending = set(db.scalars(select(EmailOutbox.message_id).where(
+                EmailOutbox.message_id.in_([row["id"] for row in expired]),
+                EmailOutbox.status.in_(("pending", "sending")),
+            )))
+            expired = [row for row in expired if row["id"] not in pending]
+            counts["pending_skipped"] += len(pending)
+        if expired:
+            ids = [row["id"] for row in expired]
+            append_archive(expired)
+            db.execute(delete(EmailOutbox).where(EmailOutbox.message_id.in_(ids)))
+            db.execute(delete(Message).where(Message.id.in_(ids)))
+            counts["archived"] += len(ids)
+        db.commit()
+        counts["batches"] += 1
+
+        if not frozen:
+            for row in rows:
+                if row["id"] in pending:
+                    frozen = True
+                    break
+                settled = (row["created_at"], row["id"])
+        if len(rows) < RETENTION_BATCH_SIZE:
+            break
+        time.sleep(RETENTION_BATCH_PAUSE_SECONDS)
+    return settled
+
+
+def run_retention(db: Session, now: Optional[datetime] = None) -> dict:
+    """Archive and delete expired messages in batches; returns counts"""
+    counts = {"scanned": 0, "archived": 0, "pending_skipped": 0, "batches": 0}
+    if not retention_enabled():
+        return counts
+    now = now or utcnow()
+    all_cutoff = now - timedelta(days=RETENTION_DAYS) if RETENTION_DAYS > 0 else None
+    blocked_cutoff = now - timedelta(days=RETENTION_BLOCKED_DAYS) if RETENTION_BLOCKED_DAYS > 0 else None
+
+    if all_cutoff is not None:
+        sweep(db, Message.created_at < all_cutoff, None, lambda row: True, counts)
+
+    # Rows older than all_cutoff are gone already; only the band above it is left
+    if blocked_cutoff is not None and (all_cutoff is None or blocked_cutoff > all_cutoff):
+        is_blocked, fingerprint = load_blocked(db)
+        state = load_state()
+        after = None
+        if state.get("blocklist") == fingerprint and state.get("blocked_after"):
+            created_at, id_ = state["blocked_after"]
+            after = (datetime.fromisoformat(created_at), id_)
+        condition = Message.created_at < blocked_cutoff
+        if all_cutoff is not None:
+            condition = condition & (Message.created_at >= all_cutoff)
+        settled = sweep(db, condition, after, lambda row: is_blocked(row["email"], row["ip_address"]), counts)
+        save_state({
+            "blocked_after": [settled[0].isoformat(), settled[1]] if settled else None,
+            "blocklist": fingerprint,
+        })
+    return counts
+
+
+def compact(engine: Engine) -> None:
+    """
+    Return the space freed by deletes to the OS and merge the search index.
+    VACUUM locks the whole database while it runs; schedule it off-peak.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if engine.dialect.name == "sqlite":
+            if conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'")).first():
+                conn.execute(text("INSERT INTO messages_fts(messages_fts) VALUES ('optimize')"))
+            conn.execute(text("VACUUM"))
+            conn.execute(text("PRAGMA optimize"))
+        elif engine.dialect.name == "postgresql":
+            conn.execute(text("VACUUM (ANALYZE) messages"))
+            conn.execute(text("VACUUM (ANALYZE) email_outbox"))
+
+
+def run_retention_once(session_factory, engine: Engine, compact_after: bool = False) -> dict:
+    """One locked run; 'skipped' is set when another worker holds the lock"""
+    with retention_lock() as acquired:
+        if not acquired:
+            return {"skipped": True}
+        started = time.perf_counter()
+        with session_factory() as db:
+            counts = run_retention(db)
+        if compact_after:
+            compact(engine)
+        counts["seconds"] = round(time.perf_counter() - started, 3)
+        return counts
+
+
+def list_archives() -> List[dict]:
+    directory = ARCHIVE_DIR / "messages"
+    if not directory.exists():
+        return []
+    return [
+        {"day": path.name.split(".")[0], "bytes": path.stat().st_size}
+        for path in sorted(directory.glob("*.jsonl.gz"))
+    ]
+
+
+def read_archive(day: date, email: Optional[str] = None, chunk_rows: int = 1000) -> Iterator[bytes]:
+    """NDJSON chunks of one day's archive, optionally only one sender's rows"""
+    needle = json.dumps(email)[1:-1] if email else None
+    with gzip.open(archive_path(day), "rt", encoding="utf-8") as archive:
+        chunk = []
+        for line in archive:
+            # Cheap substring test first; parse only the candidates
+            if needle and (needle not in line or json.loads(line)["email"] != email):
+                continue
+            chunk.append(line)
+            if len(chunk) == chunk_rows:
+                yield "".join(chunk).encode()
+                chunk = []
+        if chunk:
+            yield "".join(chunk).encode()
+
+
+if __name__ == "__main__":
+    from database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Archive and delete expired contact messages")
+    parser.add_argument("--compact", action="store_true", help="VACUUM afterwards to reclaim space")
+    args = parser.parse_args()
+    counts = run_retention_once(SessionLocal, engine, args.compact)
+    logging.getLogger("retention").info("Retention run finished", extra={"event": "retention.run", **counts})
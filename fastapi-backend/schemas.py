@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, computed_field
 from typing import Optional
 from datetime import datetime
 
+from images import image_srcset
+
 
 # Project schemas
 class ProjectBase(BaseModel):
@@ -20,10 +22,34 @@ class ProjectCreate(ProjectBase):
 class ProjectResponse(ProjectBase):
     id: int
 
+    @computed_field
+    @property
+    def image_srcset(self) -> Optional[str]:
+        """Resized variants of a local image_url (see images.py); None for remote images"""
+        return image_srcset(self.image_url)
+
     class Config:
         from_attributes = True
 
 
+class TagFacet(BaseModel):
+    tag: str
+    count: int
+
+
+class ProjectPage(BaseModel):
+    items: list[ProjectResponse]
+    # Projects matching the filters, across all pages
+    total: int
+    # Tag counts over all matching projects, most common first
+    facets: list[TagFacet]
+
+
+class BulkWriteResponse(BaseModel):
+    inserted: int
+    updated: int
+
+
 # Skill schemas
 class SkillBase(BaseModel):
     name: str
@@ -41,6 +67,17 @@ class SkillResponse(SkillBase):
         from_attributes = True
 
 
+class SkillGroup(BaseModel):
+    category: str
+    skills: list[SkillResponse]
+
+
+class BootstrapResponse(BaseModel):
+    projects: list[ProjectResponse]
+    # Skills grouped by category, categories in order of their first skill
+    skill_groups: list[SkillGroup]
+
+
 # Message schemas
 class MessageBase(BaseModel):
     name: str
@@ -62,6 +99,28 @@ class MessageResponse(MessageBase):
         from_attributes = True
 
 
+class AdminMessageResponse(MessageResponse):
+    ip_address: Optional[str] = None
+
+
+class MessagePage(BaseModel):
+    items: list[AdminMessageResponse]
+    # Opaque cursor for the next (older) page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class MessageSearchHit(AdminMessageResponse):
+    # HTML-escaped excerpt with matches wrapped in <mark>
+    snippet: str
+    # Lower is a better match
+    rank: float
+
+
+class MessageSearchPage(BaseModel):
+    items: list[MessageSearchHit]
+    next_cursor: Optional[str] = None
+
+
 # BlockedSender schemas
 class BlockSenderRequest(BaseModel):
     email: Optional[str] = None
@@ -78,3 +137,12 @@ class BlockedSenderResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Email outbox schemas
+class OutboxStatusResponse(BaseModel):
+    pending: int
+    sending: int
+    sent: int
+    dead: int
+    oldest_pending_seconds: Optional[float] = None
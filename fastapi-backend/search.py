@@ -0,0 +1,248 @@
+"""
+Full-text search over contact messages.
+
+- SQLite: an FTS5 table with external content (messages_fts), kept in
+  sync by insert/update/delete triggers on messages.
+- PostgreSQL: a generated tsvector column (messages.search_vector) with a
+  GIN index.
+
+Either way the index is maintained by the database as rows are written,
+so create_message needs no extra work. Both use plain, unstemmed tokens
+(unicode61 / the 'simple' config), so a query matches the same rows on
+both backends.
+
+Broad terms can match millions of spam rows. Ranking is therefore limited
+to the newest SEARCH_RANK_WINDOW matches; order="recent" walks every match
+newest first with a keyset cursor instead.
+"""
+import base64
+import html
+import json
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Message
+
+# Ranked search only scores this many of the newest matches
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "10000"))
+
+# Placeholders the database wraps around matches; swapped for <mark> after escaping
+MARK_OPEN, MARK_CLOSE = "\ue000", "\ue001"
+
+SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE messages_fts USING fts5(
+        name, email, message,
+        content='messages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, name, email, message)
+        VALUES (new.id, new.name, new.email, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, name, email, message)
+        VALUES ('delete', old.id, old.name, old.email, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, name, email, message)
+        VALUES ('delete', old.id, old.name, old.email, old.message);
+        INSERT INTO messages_fts(rowid, name, email, message)
+        VALUES (new.id, new.name, new.email, new.message);
+    END
+    """,
+    # Index the rows that existed before the FTS table did
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_DDL = [
+    """
+    ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(email, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(message, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_messages_search_vector ON messages USING GIN (search_vector)",
+]
+
+
+def init_search(engine: Engine) -> None:
+    """Create the search index for engine's backend if it doesn't exist yet"""
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages_fts'")
+            ).first()
+            if not exists:
+                for statement in SQLITE_DDL:
+                    conn.execute(text(statement))
+        elif engine.dialect.name == "postgresql":
+            for statement in POSTGRES_DDL:
+                conn.execute(text(statement))
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query that can't raise a syntax error:
+    every word becomes a quoted phrase (all must match) and a trailing *
+    keeps its prefix meaning.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', "")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def to_tsquery(query: str) -> str:
+    """Same semantics as to_fts_query, in to_tsquery syntax"""
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        # Quoting each word as a phrase lets to_tsquery split it the way to_tsvector did
+        word = word.rstrip("*").replace("'", "").replace("\\", "")
+        if word:
+            terms.append(f"'{word}'" + (":*" if prefix else ""))
+    return " & ".join(terms)
+
+
+def highlight(snippet: Optional[str]) -> str:
+    """HTML-escape a snippet, then turn the match placeholders into <mark> tags"""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(MARK_OPEN, "<mark>").replace(MARK_CLOSE, "</mark>")
+
+
+def encode_search_cursor(position: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_search_cursor(cursor: Optional[str]) -> dict:
+    if not cursor:
+        return {}
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {key: int(value) for key, value in position.items() if key in ("offset", "floor", "before_id")}
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+
+
+SQLITE_SEARCH = """
+SELECT m.id, m.name, m.email, m.message, m.ip_address, m.created_at,
+       snippet(messages_fts, -1, :mark_open, :mark_close, '…', 16) AS snippet,
+       bm25(messages_fts, 4.0, 4.0, 1.0) AS rank
+FROM messages_fts JOIN messages AS m ON m.id = messages_fts.rowid
+WHERE messages_fts MATCH :query {window}
+ORDER BY {order}
+LIMIT :limit OFFSET :offset
+"""
+
+# Smallest rowid among the newest :window matches; walks the index backwards
+SQLITE_WINDOW_FLOOR = """
+SELECT min(rowid) FROM (
+    SELECT rowid FROM messages_fts WHERE messages_fts MATCH :query
+    ORDER BY rowid DESC LIMIT :window
+)
+"""
+
+POSTGRES_SEARCH = """
+SELECT page.*,
+       ts_headline('simple', page.message, to_tsquery('simple', :query),
+                   'StartSel=' || :mark_open || ', StopSel=' || :mark_close
+                   || ', MaxFragments=1, MaxWords=24, MinWords=8') AS snippet
+FROM (
+    SELECT m.id, m.name, m.email, m.message, m.ip_address, m.created_at,
+           -ts_rank_cd(m.search_vector, to_tsquery('simple', :query)) AS rank
+    FROM messages AS m
+    WHERE m.search_vector @@ to_tsquery('simple', :query) {window}
+    ORDER BY {order}
+    LIMIT :limit OFFSET :offset
+) AS page
+ORDER BY {outer_order}
+"""
+
+POSTGRES_WINDOW_FLOOR = """
+SELECT min(id) FROM (
+    SELECT id FROM messages WHERE search_vector @@ to_tsquery('simple', :query)
+    ORDER BY id DESC LIMIT :window
+) AS newest
+"""
+
+
+async def search_messages(
+    db: AsyncSession,
+    query: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    order: str = "rank",
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Run a search and return (rows, next_cursor). Rows carry the message
+    columns plus an HTML-safe snippet and rank (lower is better).
+    Raises ValueError for an empty query or a bad cursor.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        match = to_fts_query(query)
+        statement, window_floor = SQLITE_SEARCH, SQLITE_WINDOW_FLOOR
+        # A range on the FTS rowid is answered from the index; one on m.id is not
+        id_column = "messages_fts.rowid"
+    else:
+        match = to_tsquery(query)
+        statement, window_floor = POSTGRES_SEARCH, POSTGRES_WINDOW_FLOOR
+        id_column = "m.id"
+    if not match:
+        raise ValueError("Search query has no searchable words")
+
+    position = decode_search_cursor(cursor)
+    params = {
+        "query": match,
+        "limit": limit + 1,
+        "offset": 0,
+        "mark_open": MARK_OPEN,
+        "mark_close": MARK_CLOSE,
+    }
+    if order == "recent":
+        window = f"AND {id_column} < :before_id" if "before_id" in position else ""
+        params["before_id"] = position.get("before_id")
+        order_by, outer_order = f"{id_column} DESC", "id DESC"
+    else:
+        # Later pages reuse the first page's window so results don't shift
+        floor = position.get("floor")
+        if floor is None:
+            floor = (await db.execute(
+                text(window_floor), {"query": match, "window": SEARCH_RANK_WINDOW}
+            )).scalar() or 0
+        window = f"AND {id_column} >= :floor"
+        params["floor"] = floor
+        params["offset"] = position.get("offset", 0)
+        order_by = f"rank, {id_column} DESC"
+        outer_order = "rank, id DESC"
+
+    sql = statement.format(window=window, order=order_by, outer_order=outer_order)
+    # Typed so created_at comes back as a datetime on SQLite too
+    typed = text(sql).columns(created_at=Message.__table__.c.created_at.type)
+    rows = [dict(row._mapping) for row in (await db.execute(typed, params))]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if order == "recent":
+            next_cursor = encode_search_cursor({"before_id": rows[-1]["id"]})
+        else:
+            next_cursor = encode_search_cursor({"offset": params["offset"] + limit, "floor": params["floor"]})
+    for row in rows:
+        row["snippet"] = highlight(row["snippet"])
+    return rows, next_cursor
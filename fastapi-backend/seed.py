@@ -1,12 +1,23 @@
 """
 Seed script to populate the database with initial data.
 Run with: python seed.py
+
+Load a larger catalog (JSON or NDJSON, see catalog.read_fixture) with:
+python seed.py --fixture catalog.ndjson
 """
-from database import SessionLocal, engine, Base
+import argparse
+import logging
+from pathlib import Path
+
+from catalog import bulk_write, load_fixture
+from database import SessionLocal, init_db
 from models import Project, Skill
+from schemas import ProjectCreate, SkillCreate
+
+logger = logging.getLogger(__name__)
 
 # Create tables
-Base.metadata.create_all(bind=engine)
+init_db()
 
 
 def seed_database():
@@ -17,35 +28,35 @@ def seed_database():
         existing_projects = db.query(Project).count()
         if existing_projects == 0:
             projects = [
-                Project(
+                ProjectCreate(
                     title="CSES-solutions",
                     description="A curated collection of solutions to problems on the CSES Problem Set. Solutions are written in modern C++, focused on competitive programming techniques like dynamic programming, graphs, and greedy algorithms.",
                     tech_stack=["C++", "Algorithms", "DSA"],
                     github_link="https://github.com/Rupesh-110805/CSES-solutions",
                     image_url="https://images.unsplash.com/photo-1515879218367-8466d910aaa4?auto=format&fit=crop&q=80&w=1000",
                 ),
-                Project(
+                ProjectCreate(
                     title="DDoS Attack Detection",
                     description="A machine learning-based DDoS attack detection system using network traffic analysis. Implements classification models to identify malicious traffic patterns in real-time.",
                     tech_stack=["FastAPI", "Network Security"],
                     github_link="https://github.com/Rupesh-110805/DDoS-Attack-Detection",
                     image_url="/ddos-project.png",
                 ),
-                Project(
+                ProjectCreate(
                     title="django-chat-app",
                     description="A real-time chat application built with Django and WebSockets. Users can exchange messages in chat rooms with session management and intuitive UI.",
                     tech_stack=["Django", "WebSockets", "PostgreSQL", "Redis"],
                     github_link="https://github.com/Rupesh-110805/django-chat-app",
                     image_url="/django-chat-app.png",
                 ),
-                Project(
+                ProjectCreate(
                     title="Pneumonia-Detection-XAI",
                     description="A pneumonia detection model using CNN with explainable AI (XAI) visualizations on chest X-rays. Provides interpretability for medical imaging decisions.",
                     tech_stack=["Python", "PyTorch", "Deep Learning", "XAI"],
                     github_link="https://github.com/Rupesh-110805/Pneumonia-Detection-XAI",
                     image_url="https://images.unsplash.com/photo-1530213786676-41ad9f7736f6?auto=format&fit=crop&q=80&w=1000",
                 ),
-                Project(
+                ProjectCreate(
                     title="Talent-flow",
                     description="A mini hiring platform built with TypeScript and modern frontend stack. Includes project-level features like search, filters, and intuitive UI components.",
                     tech_stack=["TypeScript", "React", "Frontend Design"],
@@ -53,47 +64,71 @@ def seed_database():
                     image_url="https://images.unsplash.com/photo-1586281380349-632531db7ed4?auto=format&fit=crop&q=80&w=1000",
                 ),
             ]
-            db.add_all(projects)
-            print("✓ Seeded projects")
+            bulk_write(db, "project", projects)
+            logger.info("Seeded projects", extra={"event": "seed.projects"})
 
         # Check if skills already exist
         existing_skills = db.query(Skill).count()
         if existing_skills == 0:
             skills = [
                 # Languages
-                Skill(name="C++", category="Languages"),
-                Skill(name="Python", category="Languages"),
-                Skill(name="SQL", category="Languages"),
-                Skill(name="JavaScript", category="Languages"),
-                Skill(name="TypeScript", category="Languages"),
+                SkillCreate(name="C++", category="Languages"),
+                SkillCreate(name="Python", category="Languages"),
+                SkillCreate(name="SQL", category="Languages"),
+                SkillCreate(name="JavaScript", category="Languages"),
+                SkillCreate(name="TypeScript", category="Languages"),
                 # Frameworks
-                Skill(name="React", category="Frameworks"),
-                Skill(name="Django", category="Frameworks"),
-                Skill(name="FastAPI", category="Frameworks"),
-                Skill(name="Flask", category="Frameworks"),
-                Skill(name="Machine Learning", category="Frameworks"),
-                Skill(name="CNNs", category="Frameworks"),
+                SkillCreate(name="React", category="Frameworks"),
+                SkillCreate(name="Django", category="Frameworks"),
+                SkillCreate(name="FastAPI", category="Frameworks"),
+                SkillCreate(name="Flask", category="Frameworks"),
+                SkillCreate(name="Machine Learning", category="Frameworks"),
+                SkillCreate(name="CNNs", category="Frameworks"),
                 # Tools
-                Skill(name="Linux", category="Tools"),
-                Skill(name="Docker", category="Tools"),
-                Skill(name="Git/GitHub", category="Tools"),
-                Skill(name="GitHub Actions", category="Tools"),
-                Skill(name="WebSockets", category="Tools"),
-                Skill(name="DSA", category="Tools"),
-                Skill(name="Competitive Programming", category="Tools"),
+                SkillCreate(name="Linux", category="Tools"),
+                SkillCreate(name="Docker", category="Tools"),
+                SkillCreate(name="Git/GitHub", category="Tools"),
+                SkillCreate(name="GitHub Actions", category="Tools"),
+                SkillCreate(name="WebSockets", category="Tools"),
+                SkillCreate(name="DSA", category="Tools"),
+                SkillCreate(name="Competitive Programming", category="Tools"),
             ]
-            db.add_all(skills)
-            print("✓ Seeded skills")
+            bulk_write(db, "skill", skills)
+            logger.info("Seeded skills", extra={"event": "seed.skills"})
 
         db.commit()
-        print("✓ Database seeding complete!")
+        logger.info("Database seeding complete", extra={"event": "seed.done"})
+
+    except Exception:
+        logger.exception("Error seeding database", extra={"event": "seed.failed"})
+        db.rollback()
+    finally:
+        db.close()
+
 
-    except Exception as e:
-        print(f"✗ Error seeding database: {e}")
+def seed_from_fixture(path: Path, upsert: bool = True):
+    db = SessionLocal()
+    try:
+        totals = load_fixture(db, path, upsert=upsert)
+        for kind, counts in totals.items():
+            logger.info("%ss: %d inserted, %d updated", kind, counts["inserted"], counts["updated"],
+                        extra={"event": "seed.fixture", "kind": kind, **counts})
+        # Running servers pick this up on their next catalog check, or
+        # immediately via POST /api/admin/catalog/refresh
+    except Exception:
+        logger.exception("Error loading fixture %s", path, extra={"event": "seed.failed"})
         db.rollback()
+        raise SystemExit(1)
     finally:
         db.close()
 
 
 if __name__ == "__main__":
-    seed_database()
+    parser = argparse.ArgumentParser(description="Seed the portfolio database")
+    parser.add_argument("--fixture", type=Path, help="JSON or NDJSON catalog to bulk upsert")
+    parser.add_argument("--no-upsert", action="store_true", help="insert every row, even if its key exists")
+    args = parser.parse_args()
+    if args.fixture:
+        seed_from_fixture(args.fixture, upsert=not args.no_upsert)
+    else:
+        seed_database()
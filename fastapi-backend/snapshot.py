@@ -0,0 +1,151 @@
+"""
+Pre-serialized snapshots of the public catalog (projects, skills).
+
+The response bodies are encoded once, with orjson when it is installed,
+and served as raw bytes, so GET /api/projects and /api/skills do no ORM,
+Pydantic or JSON work per request. A snapshot is rebuilt when this
+process writes to the catalog (create_project, bulk upserts), on an admin
+refresh, or when the periodic check finds that another process (seed.py,
+another uvicorn worker) changed the tables. That check reads only a
+fingerprint per table (row count, max id, catalog_versions counter) and
+re-serializes just the tables whose fingerprint moved; edits made outside
+the app's write paths need an admin refresh.
+
+"bootstrap" (GET /api/bootstrap) combines both: projects plus skills
+grouped by category, rebuilt together with them.
+"""
+import json
+import math
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from cache import CachedBody
+from models import CatalogVersion, Project, Skill
+from schemas import ProjectResponse, SkillResponse
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, the stdlib encoder works too
+    orjson = None
+
+CATALOG_SNAPSHOT = os.getenv("CATALOG_SNAPSHOT", "true").lower() == "true"
+# Seconds between checks for catalog changes made outside this process
+CATALOG_REFRESH_SECONDS = float(os.getenv("CATALOG_REFRESH_SECONDS", "60"))
+
+# Snapshot key -> (model, response schema). Columns come from the schema so
+# the bytes match what the Pydantic path would produce.
+CATALOG_SOURCES = {
+    "projects": (Project, ProjectResponse),
+    "skills": (Skill, SkillResponse),
+}
+
+
+def dumps(rows) -> bytes:
+    """Compact JSON bytes, the same shape Pydantic's dump_json emits"""
+    if orjson is not None:
+        return orjson.dumps(rows)
+    return json.dumps(rows, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def catalog_rows(db: Session, key: str) -> list:
+    """
+    Select the response columns straight into dicts, in id order, then
+    append the schema's computed fields (e.g. ProjectResponse.image_srcset)
+    """
+    model, schema = CATALOG_SOURCES[key]
+    fields = list(schema.model_fields)
+    result = db.execute(select(*(getattr(model, f) for f in fields)).order_by(model.id))
+    rows = [dict(zip(fields, row)) for row in result]
+    computed = list(schema.model_computed_fields)
+    for row in rows:
+        instance = schema.model_construct(**row)
+        row.update((name, getattr(instance, name)) for name in computed)
+    return rows
+
+
+def catalog_fingerprint(db: Session, key: str) -> Tuple:
+    """(row count, max id, write counter): changes on every catalog write path"""
+    model, _ = CATALOG_SOURCES[key]
+    count, max_id = db.execute(select(func.count(), func.max(model.id)).select_from(model)).one()
+    version = db.scalar(select(CatalogVersion.version).where(CatalogVersion.name == model.__tablename__))
+    return count, max_id, version or 0
+
+
+def serialize_catalog(db: Session, key: str) -> bytes:
+    return dumps(catalog_rows(db, key))
+
+
+def group_skills(skills: list) -> list:
+    """[{category, skills}] with categories in order of their first skill"""
+    groups = {}
+    for skill in skills:
+        groups.setdefault(skill["category"], []).append(skill)
+    return [{"category": category, "skills": items} for category, items in groups.items()]
+
+
+def serialize_bootstrap(db: Session) -> bytes:
+    """Everything the home page needs in one body"""
+    return dumps({
+        "projects": catalog_rows(db, "projects"),
+        "skill_groups": group_skills(catalog_rows(db, "skills")),
+    })
+
+
+class CatalogSnapshot:
+    """Serialized catalog bodies that never expire; replaced on rebuild"""
+
+    def __init__(self):
+        self.rebuilds = 0
+        self._entries: Dict[str, CachedBody] = {}
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        return self._entries.get(key)
+
+    def rebuild(self, db: Session, *keys: str) -> list:
+        """Re-serialize the given keys (all of them by default); returns the keys"""
+        keys = list(keys or CATALOG_SOURCES)
+        for key in keys:
+            # Taken before serializing: a write landing in between only
+            # causes one extra rebuild on the next check
+            self._fingerprints[key] = catalog_fingerprint(db, key)
+            self._store(key, serialize_catalog(db, key))
+        self._store("bootstrap", serialize_bootstrap(db))
+        return keys
+
+    def _store(self, key: str, body: bytes) -> None:
+        entry = CachedBody(body, math.inf)
+        with self._lock:
+            self._entries[key] = entry
+            self.rebuilds += 1
+
+    def refresh_if_changed(self, db: Session) -> list:
+        """
+        Compare each table's fingerprint with the one recorded at its last
+        rebuild and re-serialize only the tables that moved, so unchanged
+        snapshots keep their ETag. Returns the keys that were replaced.
+        """
+        changed = [
+            key for key in CATALOG_SOURCES
+            if key not in self._entries or self._fingerprints.get(key) != catalog_fingerprint(db, key)
+        ]
+        if changed:
+            self.rebuild(db, *changed)
+        return changed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": CATALOG_SNAPSHOT,
+                "encoder": "orjson" if orjson is not None else "json",
+                "rebuilds": self.rebuilds,
+                "entries": {key: len(entry.body) for key, entry in self._entries.items()},
+            }
+
+
+catalog_snapshot = CatalogSnapshot()
@@ -0,0 +1,185 @@
+"""
+Near-duplicate detection for contact messages.
+
+Each body is reduced to a 64-bit SimHash over word 3-shingles (digits
+folded, so "order #123" and "order #456" look alike). Two bodies are near
+duplicates when their fingerprints differ in at most `max_distance` bits.
+
+The index splits fingerprints into max_distance + 1 bands and buckets
+entries by (band, value). By the pigeonhole principle any fingerprint
+within max_distance bits shares at least one band exactly, so a lookup
+only compares against its own buckets. Entries live in a bounded window
+(count and age); the oldest are evicted first.
+
+Once a body has `threshold` near duplicates in the window it is caught.
+Caught bodies are not added to the index; instead the matched entries are
+refreshed, which keeps an active flood's cluster alive and its buckets
+small. Work per message is therefore O(1) amortized.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Off, or what to do with a caught message: 'shadowban' stores it without
+# sending email, 'coalesce' skips both the insert and the email
+SPAM_DUPLICATE_ACTION = os.getenv("SPAM_DUPLICATE_ACTION", "shadowban")
+# Near duplicates already in the window before a message is caught
+SPAM_DUPLICATE_THRESHOLD = int(os.getenv("SPAM_DUPLICATE_THRESHOLD", "3"))
+# Max differing fingerprint bits (of 64) for two bodies to count as near duplicates
+SPAM_SIMHASH_MAX_DISTANCE = int(os.getenv("SPAM_SIMHASH_MAX_DISTANCE", "3"))
+SPAM_WINDOW_SIZE = int(os.getenv("SPAM_WINDOW_SIZE", "5000"))
+SPAM_WINDOW_SECONDS = float(os.getenv("SPAM_WINDOW_SECONDS", "3600"))
+# Shorter bodies ("hi", "thanks!") are too alike to judge
+SPAM_MIN_TOKENS = int(os.getenv("SPAM_MIN_TOKENS", "8"))
+
+if SPAM_DUPLICATE_ACTION not in ("off", "shadowban", "coalesce"):
+    raise ValueError("SPAM_DUPLICATE_ACTION must be one of: off, shadowban, coalesce")
+
+FINGERPRINT_BITS = 64
+# Very long bodies are fingerprinted from their first shingles only
+MAX_SHINGLES = 512
+
+TOKEN_RE = re.compile(r"\w+")
+DIGITS_RE = re.compile(r"\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(DIGITS_RE.sub("0", text.lower()))
+
+
+def simhash(tokens: List[str]) -> int:
+    """64-bit SimHash of the token 3-shingles"""
+    if len(tokens) >= 3:
+        shingles = [" ".join(tokens[i:i + 3]) for i in range(min(len(tokens) - 2, MAX_SHINGLES))]
+    else:
+        shingles = tokens
+    # One bit string per shingle; a column's majority bit is the fingerprint's bit
+    rows = [
+        format(int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big"), "064b")
+        for shingle in shingles
+    ]
+    half = len(rows) / 2
+    bits = "".join("1" if column.count("1") > half else "0" for column in map("".join, zip(*rows)))
+    return int(bits, 2) if bits else 0
+
+
+def band_ranges(bands: int) -> List[Tuple[int, int]]:
+    """(shift, mask) per band, splitting 64 bits as evenly as possible"""
+    ranges, start = [], 0
+    for band in range(bands):
+        width = FINGERPRINT_BITS // bands + (1 if band < FINGERPRINT_BITS % bands else 0)
+        ranges.append((start, (1 << width) - 1))
+        start += width
+    return ranges
+
+
+class NearDuplicateIndex:
+    """Bounded, banded SimHash index of recent message bodies"""
+
+    def __init__(
+        self,
+        max_distance: int = SPAM_SIMHASH_MAX_DISTANCE,
+        threshold: int = SPAM_DUPLICATE_THRESHOLD,
+        window_size: int = SPAM_WINDOW_SIZE,
+        window_seconds: float = SPAM_WINDOW_SECONDS,
+        min_tokens: int = SPAM_MIN_TOKENS,
+    ):
+        self.max_distance = max_distance
+        self.threshold = threshold
+        self.window_size = window_size
+        self.window_seconds = window_seconds
+        self.min_tokens = min_tokens
+        self._bands = band_ranges(max_distance + 1)
+        # entry id -> (fingerprint, last seen), oldest first
+        self._entries: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.caught = 0
+
+    def _keys(self, fingerprint: int):
+        for band, (shift, mask) in enumerate(self._bands):
+            yield band, fingerprint >> shift & mask
+
+    def _evict(self, now: float) -> None:
+        while self._entries:
+            entry_id, (fingerprint, seen) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.window_size and now - seen <= self.window_seconds:
+                break
+            del self._entries[entry_id]
+            for key in self._keys(fingerprint):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def check(self, text: str, now: Optional[float] = None) -> bool:
+        """
+        Record text and return True when it is a near duplicate of at least
+        `threshold` bodies in the window.
+        """
+        tokens = tokenize(text)
+        if len(tokens) < self.min_tokens:
+            return False
+        fingerprint = simhash(tokens)
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            self.checked += 1
+            self._evict(now)
+            matches: List[int] = []
+            compared: Set[int] = set()
+            for key in self._keys(fingerprint):
+                for entry_id in self._buckets.get(key, ()):
+                    if entry_id in compared:
+                        continue
+                    compared.add(entry_id)
+                    if (self._entries[entry_id][0] ^ fingerprint).bit_count() <= self.max_distance:
+                        matches.append(entry_id)
+                        if len(matches) >= self.threshold:
+                            break
+                if len(matches) >= self.threshold:
+                    break
+
+            if len(matches) >= self.threshold:
+                self.caught += 1
+                # Keep the flood's cluster alive instead of growing it
+                for entry_id in matches:
+                    self._entries[entry_id] = (self._entries[entry_id][0], now)
+                    self._entries.move_to_end(entry_id)
+                return True
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (fingerprint, now)
+            for key in self._keys(fingerprint):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            return False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "action": SPAM_DUPLICATE_ACTION,
+                "checked": self.checked,
+                "caught": self.caught,
+                "entries": len(self._entries),
+                "buckets": len(self._buckets),
+                "threshold": self.threshold,
+                "max_distance": self.max_distance,
+                "window_size": self.window_size,
+                "window_seconds": self.window_seconds,
+            }
+
+
+duplicate_index = NearDuplicateIndex()
@@ -0,0 +1,107 @@
+"""
+Read-replica routing (DATABASE_READ_URL), checked against two SQLite files.
+
+The replica is seeded with different rows than the primary, so each
+response shows which database served it.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = tempfile.mkdtemp()
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{DATA_DIR}/primary.db",
+    DATABASE_READ_URL=f"sqlite:///{DATA_DIR}/replica.db",
+    ADMIN_SECRET="test-secret",
+    CATALOG_SNAPSHOT="false",
+    RATE_LIMIT_BACKEND="memory",
+)
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import database  # noqa: E402
+import main  # noqa: E402
+from cache import response_cache  # noqa: E402
+from database import Base, engine, read_engine  # noqa: E402
+from models import Project  # noqa: E402
+
+ADMIN_HEADERS = {"X-Admin-Secret": "test-secret"}
+
+
+def new_project(title: str) -> dict:
+    return {"title": title, "description": "d", "tech_stack": ["Python"], "image_url": "https://example.com/p.png"}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def databases():
+    for bind, title in ((engine, "On primary"), (read_engine, "On replica")):
+        Base.metadata.create_all(bind=bind)
+        with bind.begin() as conn:
+            conn.execute(Project.__table__.insert(), [new_project(title)])
+    main.rate_limiter.enabled = False
+    yield
+    main.rate_limiter.enabled = True
+
+
+@pytest.fixture
+def client():
+    database._last_primary_write = float("-inf")
+    response_cache.invalidate()
+    # No lifespan: the background workers aren't needed here
+    return TestClient(main.app)
+
+
+def titles(client) -> set:
+    response = client.get("/api/projects")
+    assert response.status_code == 200
+    return {project["title"] for project in response.json()}
+
+
+def test_catalog_reads_use_the_replica(client):
+    assert read_engine is not engine
+    assert titles(client) == {"On replica"}
+    assert client.get("/api/bootstrap").json()["projects"][0]["title"] == "On replica"
+
+
+def test_reads_follow_create_project_to_the_primary(client, monkeypatch):
+    assert client.post("/api/projects", json=new_project("Created")).status_code == 201
+    assert titles(client) == {"On primary", "Created"}
+
+    # Once the window has passed, reads go back to the replica
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 0)
+    response_cache.invalidate()
+    assert titles(client) == {"On replica"}
+
+
+def test_reads_follow_bulk_upsert_to_the_primary(client):
+    response = client.post("/api/admin/projects/bulk", json=[new_project("Bulk")], headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    assert "Bulk" in titles(client)
+    assert "On replica" not in titles(client)
+
+
+def test_without_replica_reads_share_the_primary_engine():
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_READ_URL"}
+    check = "import database; assert database.read_engine is database.engine; " \
+            "assert database.read_session_factory() is database.SessionLocal"
+    subprocess.run([sys.executable, "-c", check], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def test_snapshot_refresh_ignores_a_lagging_replica(client, monkeypatch):
+    assert client.post("/api/projects", json=new_project("Not replicated")).status_code == 201
+    # The rebuild create_project runs when CATALOG_SNAPSHOT is on
+    main.refresh_catalog_snapshot(force=True)
+    etag = main.catalog_snapshot.get("projects").etag
+
+    # The window passes while the replica still lacks the new row
+    monkeypatch.setattr(database, "READ_YOUR_WRITES_SECONDS", 0)
+    assert main.refresh_catalog_snapshot() == []
+    entry = main.catalog_snapshot.get("projects")
+    assert entry.etag == etag
+    assert b"Not replicated" in entry.body
@@ -9,8 +9,7 @@ import { Navigation } from "@/components/Navigation";
 import { SectionHeading } from "@/components/SectionHeading";
 import { ProjectCard } from "@/components/ProjectCard";
 import { SocialLinks } from "@/components/SocialLinks";
-import { useProjects } from "@/hooks/use-projects";
-import { useSkills } from "@/hooks/use-skills";
+import { useBootstrap } from "@/hooks/use-bootstrap";
 import { useSendMessage } from "@/hooks/use-messages";
 import { Loader2, ArrowRight } from "lucide-react";
 import { Link as ScrollLink } from "react-scroll";
@@ -24,8 +23,12 @@ const insertMessageSchema = z.object({
 });
 
 export default function HomePage() {
-  const { data: projects, isLoading: projectsLoading } = useProjects();
-  const { data: skills, isLoading: skillsLoading } = useSkills();
+  // One request for projects and skills; skills arrive grouped by category
+  const { data: bootstrap, isLoading: bootstrapLoading } = useBootstrap();
+  const projects = bootstrap?.projects;
+  const skillGroups = bootstrap?.skill_groups ?? [];
+  const projectsLoading = bootstrapLoading;
+  const skillsLoading = bootstrapLoading;
   const { mutateAsync: sendMessage, isPending: isSending } = useSendMessage();
   const { toast } = useToast();
 
@@ -55,12 +58,6 @@ export default function HomePage() {
     }
   };
 
-  const groupedSkills = skills?.reduce((acc, skill) => {
-    if (!acc[skill.category]) acc[skill.category] = [];
-    acc[skill.category].push(skill);
-    return acc;
-  }, {} as Record<string, typeof skills>) || {};
-
   return (
     <div className="min-h-screen bg-background text-foreground selection:bg-primary/20">
       <Navigation />
@@ -136,8 +133,8 @@ export default function HomePage() {
                 <div className="flex justify-center py-8">
                   <Loader2 className="w-8 h-8 animate-spin text-primary" />
                 </div>
-              ) : Object.keys(groupedSkills).length > 0 ? (
-                Object.entries(groupedSkills).map(([category, items]) => (
+              ) : skillGroups.length > 0 ? (
+                skillGroups.map(({ category, skills: items }) => (
                   <div key={category}>
                     <h3 className="text-lg font-bold text-foreground mb-3 font-mono border-l-2 border-primary pl-3">
                       {category}
@@ -2,6 +2,7 @@
 
 import { motion } from "framer-motion";
 import { Github, ExternalLink, Folder } from "lucide-react";
+import { apiSrcSet } from "@/lib/api";
 import type { Project } from "@/types";
 
 interface ProjectCardProps {
@@ -23,6 +24,11 @@ export function ProjectCard({ project, index }: ProjectCardProps) {
         {project.image_url ? (
           <img 
             src={project.image_url} 
+            srcSet={project.image_srcset ? apiSrcSet(project.image_srcset) : undefined}
+            // One column on mobile, two from md, three from lg (see the projects grid)
+            sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+            loading="lazy"
+            decoding="async"
             alt={project.title} 
             className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-105"
           />
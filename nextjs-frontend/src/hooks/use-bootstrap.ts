@@ -0,0 +1,15 @@
+import { useQuery } from "@tanstack/react-query";
+import { api } from "@/lib/api";
+import type { Bootstrap } from "@/types";
+
+// Projects and category-grouped skills in a single request
+export function useBootstrap() {
+  return useQuery<Bootstrap>({
+    queryKey: ["bootstrap"],
+    queryFn: async () => {
+      const res = await fetch(api.bootstrap.path);
+      if (!res.ok) throw new Error("Failed to fetch portfolio data");
+      return res.json();
+    },
+  });
+}
@@ -1,6 +1,6 @@
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
-import { api } from "@/lib/api";
-import type { Project, ProjectCreate } from "@/types";
+import { api, projectFilterQuery } from "@/lib/api";
+import type { Project, ProjectCreate, ProjectFilters, ProjectPage } from "@/types";
 
 export function useProjects() {
   return useQuery<Project[]>({
@@ -13,6 +13,20 @@ export function useProjects() {
   });
 }
 
+// Filtered, paginated projects with tag facet counts, filtered server-side
+export function useFilteredProjects(filters: ProjectFilters) {
+  // Always send a limit so the backend answers with a ProjectPage
+  const query = projectFilterQuery({ limit: 20, ...filters });
+  return useQuery<ProjectPage>({
+    queryKey: ["projects", query],
+    queryFn: async () => {
+      const res = await fetch(`${api.projects.list.path}?${query}`);
+      if (!res.ok) throw new Error("Failed to fetch projects");
+      return res.json();
+    },
+  });
+}
+
 export function useCreateProject() {
   const queryClient = useQueryClient();
   return useMutation({
@@ -33,6 +47,7 @@ export function useCreateProject() {
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["projects"] });
+      queryClient.invalidateQueries({ queryKey: ["bootstrap"] });
     },
   });
 }
@@ -1,7 +1,12 @@
+import type { ProjectFilters } from "@/types";
+
 // API configuration - points to FastAPI backend
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://127.0.0.1:8000";
 
 export const api = {
+  bootstrap: {
+    path: `${API_BASE_URL}/api/bootstrap`,
+  },
   projects: {
     list: {
       path: `${API_BASE_URL}/api/projects`,
@@ -22,4 +27,23 @@ export const api = {
   },
 };
 
+// srcset entries from the API are paths on the API server, not the frontend
+export function apiSrcSet(srcset: string): string {
+  return srcset
+    .split(", ")
+    .map((entry) => (entry.startsWith("/") ? `${API_BASE_URL}${entry}` : entry))
+    .join(", ");
+}
+
+// Query string for filtered project listings (GET /api/projects?tech=...)
+export function projectFilterQuery(filters: ProjectFilters): string {
+  const params = new URLSearchParams();
+  filters.tech?.forEach((tag) => params.append("tech", tag));
+  if (filters.match) params.set("match", filters.match);
+  if (filters.q) params.set("q", filters.q);
+  if (filters.limit !== undefined) params.set("limit", String(filters.limit));
+  if (filters.offset) params.set("offset", String(filters.offset));
+  return params.toString();
+}
+
 export default api;
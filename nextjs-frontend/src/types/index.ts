@@ -8,6 +8,8 @@ export interface Project {
   link?: string | null;
   github_link?: string | null;
   image_url: string;
+  // Resized variants of a local image_url, served by the API; null for remote images
+  image_srcset?: string | null;
 }
 
 export interface ProjectCreate {
@@ -19,12 +21,42 @@ export interface ProjectCreate {
   image_url: string;
 }
 
+export interface ProjectFilters {
+  tech?: string[];
+  match?: "all" | "any";
+  q?: string;
+  limit?: number;
+  offset?: number;
+}
+
+export interface TagFacet {
+  tag: string;
+  count: number;
+}
+
+export interface ProjectPage {
+  items: Project[];
+  total: number;
+  facets: TagFacet[];
+}
+
 export interface Skill {
   id: number;
   name: string;
   category: string;
 }
 
+export interface SkillGroup {
+  category: string;
+  skills: Skill[];
+}
+
+// GET /api/bootstrap: everything the home page renders, in one request
+export interface Bootstrap {
+  projects: Project[];
+  skill_groups: SkillGroup[];
+}
+
 export interface Message {
   id: number;
   name: string;